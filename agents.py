@@ -1,35 +1,160 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import httpx
 from crewai import Agent, Task, LLM, Process, Crew
-from crewai_tools import SerperDevTool
+from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+from crewai.llms.hooks import BaseInterceptor
 
+import metrics
+from cache import DiskCache, content_key, normalize_text
+from dedup import deduplicate, fingerprint
+from enrichment import ENRICH, enrich_jobs
+from fanout import SubSearch, plan_sub_searches, run_fanout
+from job_parser import JobStreamParser, parse_jobs
+from job_store import MIN_LOCAL_RESULTS, JobStore
 from models import ResumeAnalysis, JobSearchResults
+from ratelimit import get_limiter
+from search_tool import CachedSerperTool
+from skills import analyze_resume_locally, keyword_experience_level, load_extractor
+
+MODEL = "openai/gpt-5-nano"
+PROMPT_VERSION = "1"
+ANALYSIS_MODE = os.getenv("OPENSCOUT_ANALYSIS_MODE", "llm")
+ANALYSIS_MODES = ("llm", "hybrid", "local")
+FANOUT = os.getenv("OPENSCOUT_FANOUT", "").lower() in ("1", "true", "yes")
+LOCAL_FIRST = os.getenv("OPENSCOUT_LOCAL_FIRST", "").lower() in ("1", "true", "yes")
+STREAM_JOBS = os.getenv("OPENSCOUT_STREAM_JOBS", "1").lower() in ("1", "true", "yes")
+LLM_RETRIES = int(os.getenv("OPENSCOUT_LLM_RETRIES", 4))
+
+class _RetryCounter(BaseInterceptor[httpx.Request, httpx.Response]):
+    # The OpenAI SDK retries 429/5xx by itself and numbers each attempt in this header.
+    def on_outbound(self, message: httpx.Request) -> httpx.Request:
+        if message.headers.get("x-stainless-retry-count", "0") != "0":
+            metrics.add_retries()
+        return message
+
+    def on_inbound(self, message: httpx.Response) -> httpx.Response:
+        return message
+
+    async def aon_outbound(self, message: httpx.Request) -> httpx.Request:
+        return self.on_outbound(message)
+
+    async def aon_inbound(self, message: httpx.Response) -> httpx.Response:
+        return message
+
 
 llm = LLM(
-    model="openai/gpt-5-nano",
+    model=MODEL,
+    max_retries=LLM_RETRIES,
+    interceptor=_RetryCounter(),
+)
+
+job_store = JobStore()
+
+resume_cache = DiskCache(
+    "resume_analysis",
+    ttl=float(os.getenv("OPENSCOUT_RESUME_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("OPENSCOUT_RESUME_CACHE_MAX_ENTRIES", 5000)),
+)
+
+
+ANALYSIS_READY = "analysis"
+JOB_FOUND = "job"
+DONE = "done"
+_FAILED = "failed"
+
+
+class SearchEvent(NamedTuple):
+    kind: str
+    data: object
+
+
+def resume_cache_key(resume_text: str, analysis_mode: str = "llm") -> str:
+    parts = [normalize_text(resume_text), MODEL, PROMPT_VERSION]
+    if analysis_mode != "llm":
+        parts += [analysis_mode, load_extractor().version]
+    return content_key(*parts)
+
+
+def refine_experience_level(resume_text: str):
+    answer = llm.call([{
+        "role": "user",
+        "content": (
+            "Classifique o nível de experiência do candidato do currículo abaixo. "
+            "Responda apenas com uma palavra: Junior, Pleno ou Senior.\n\n"
+            f"Currículo: {resume_text}"
+        ),
+    }])
+    return keyword_experience_level(str(answer))
+
+
+def analyze_resume_fast(resume_text: str, analysis_mode: str) -> ResumeAnalysis:
+    with metrics.span("analysis:local"):
+        analysis, ambiguous = analyze_resume_locally(resume_text)
+    if analysis_mode == "hybrid" and "experience_level" in ambiguous:
+        with metrics.span("analysis:refine_level"):
+            level = refine_experience_level(resume_text)
+        if level is not None:
+            analysis.experience_level = level
+    return analysis
+
+
+def _wait_llm_slot(*_):
+    get_limiter("openai").wait()
+
+
+ANALYZE_RESUME_PROMPT = (
+    "Analise o seguinte currículo e extraia as informações solicitadas no formato JSON estrito."
+    "Não inclua explicações ou texto adicional fora do objeto JSON."
+    "Currículo: {resume_text}"
 )
 
-def search_jobs(resume_text: str):
-    analyze_resume_agent = Agent(
+SEARCH_JOBS_PROMPT = (
+    "Use as informações da análise do currículo (habilidades técnicas, nível de experiência e idiomas) "
+    "para buscar vagas relevantes {platform}. "
+    "IMPORTANTE: Combine as SKILLS do candidato com os requisitos das vagas. "
+    "Busque vagas que mencionem as principais tecnologias/linguagens do candidato. "
+    "Filtre por nível de experiência apropriado (Junior/Pleno/Senior). "
+    "Priorize vagas no Brasil e posições remotas globais. "
+    "Retorne no mínimo {min_jobs} vagas relevantes. "
+    "Inclua em url o link do anúncio de cada vaga, exatamente como aparece no resultado da busca. "
+    "Inclua o email de contato apenas se ele aparecer no resultado; caso contrário, deixe-o vazio. "
+    "{focus}{known_jobs}{analysis}"
+)
+
+serper_tool = CachedSerperTool()
+
+
+def _analyze_resume_agent():
+    return Agent(
         role="Analisador de curriculo técnico",
         goal="extrair habilidades técnicas, nível de experiência e idiomas falados de currículos de desenvolvedores.",
         backstory=(
             "Você é um agente especializado em analisar currículos técnicos de desenvolvedores de software. "
             "Seu objetivo é extrair habilidades técnicas, nível de experiência e idiomas falados."
         ),
-        llm=llm
+        llm=llm,
+        step_callback=_wait_llm_slot,
     )
-    
-    analyze_resume_task = Task(
-        description=(
-            "Analise o seguinte currículo e extraia as informações solicitadas no formato JSON estrito."
-            "Não inclua explicações ou texto adicional fora do objeto JSON."
-            f"Currículo: {resume_text}"
-        ),
+
+
+def _analyze_resume_task(agent):
+    return Task(
+        description=ANALYZE_RESUME_PROMPT,
         expected_output="JSON estrito com as chaves: experience_level, skills, languages.",
-        agent=analyze_resume_agent,
+        agent=agent,
         output_pydantic=ResumeAnalysis,
     )
 
-    search_jobs_agent = Agent(
+
+def _search_jobs_agent():
+    return Agent(
         role="Caçador de vagas tech",
         goal="Buscar vagas de tecnologia que correspondam às habilidades, experiência e localização do candidato.",
         backstory=(
@@ -38,32 +163,384 @@ def search_jobs(resume_text: str):
             "Priorize qualidade sobre quantidade."
         ),
         llm=llm,
-        tools=[SerperDevTool()]
+        tools=[serper_tool],
+        step_callback=_wait_llm_slot,
     )
-    
-    search_jobs_task = Task(
-        description=(
-            "Use as informações da análise do currículo (habilidades técnicas, nível de experiência e idiomas) "
-            "para buscar vagas relevantes no LinkedIn. "
-            "IMPORTANTE: Combine as SKILLS do candidato com os requisitos das vagas. "
-            "Busque vagas que mencionem as principais tecnologias/linguagens do candidato. "
-            "Filtre por nível de experiência apropriado (Junior/Pleno/Senior). "
-            "Priorize vagas no Brasil e posições remotas globais. "
-            "Retorne no mínimo 5 vagas relevantes. "
-            "Necessario incluir o email de contato da vaga. "
+
+
+def _search_jobs_task(agent, context=()):
+    return Task(
+        description=SEARCH_JOBS_PROMPT,
+        expected_output=(
+            'JSON estrito no formato {"jobs": [{"job_title": "", "company": "", "location": "", "platform": "", '
+            '"required_experience_level": "", "key_requirements": [""], "contact_email": "", "url": ""}]}, '
+            "sem texto fora do objeto JSON."
         ),
-        expected_output="JSON com array de vagas contendo título, empresa, localização, plataforma, nível requerido, requisitos e email de contato.",
-        agent=search_jobs_agent,
-        context=[analyze_resume_task],
-        output_pydantic=JobSearchResults,
+        agent=agent,
+        context=list(context),
     )
-    
-    crew = Crew(
-        agents=[analyze_resume_agent, search_jobs_agent],
-        tasks=[analyze_resume_task, search_jobs_task],
+
+
+def _search_inputs(analysis=None, sub_search: SubSearch | None = None, min_jobs: int = 5, known_jobs=()) -> dict:
+    inputs = {"platform": "no LinkedIn", "min_jobs": min_jobs, "focus": "", "known_jobs": "", "analysis": ""}
+    if sub_search is not None:
+        inputs["platform"] = f"no {sub_search.platform} (site:{sub_search.domain})"
+        inputs["min_jobs"] = 2
+        if sub_search.skills:
+            inputs["focus"] = f"Foque nas tecnologias: {', '.join(sub_search.skills)}. "
+    if known_jobs:
+        known = "; ".join(f"{job.job_title} ({job.company})" for job in known_jobs)
+        inputs["known_jobs"] = f"Não repita estas vagas, que já foram encontradas: {known}. "
+    if analysis is not None:
+        inputs["analysis"] = f"Análise do currículo: {analysis.model_dump_json()}"
+    return inputs
+
+
+def _build_crew(agents, tasks):
+    return Crew(
+        agents=agents,
+        tasks=tasks,
         process=Process.sequential,
         verbose=False,
     )
 
-    result = crew.kickoff()
-    return result
+
+def _analysis_crew():
+    agent = _analyze_resume_agent()
+    return _build_crew([agent], [_analyze_resume_task(agent)])
+
+
+def _search_crew():
+    agent = _search_jobs_agent()
+    return _build_crew([agent], [_search_jobs_task(agent)])
+
+
+def _analysis_search_crew():
+    analyze_resume_agent = _analyze_resume_agent()
+    search_jobs_agent = _search_jobs_agent()
+    analyze_resume_task = _analyze_resume_task(analyze_resume_agent)
+    search_jobs_task = _search_jobs_task(search_jobs_agent, [analyze_resume_task])
+    return _build_crew([analyze_resume_agent, search_jobs_agent], [analyze_resume_task, search_jobs_task])
+
+
+class CrewPool:
+    def __init__(self, build):
+        self._build = build
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            crew = self._idle.pop() if self._idle else None
+        if crew is None:
+            crew = self._build()
+        try:
+            yield crew
+        finally:
+            with self._lock:
+                self._idle.append(crew)
+
+
+analysis_crews = CrewPool(_analysis_crew)
+search_crews = CrewPool(_search_crew)
+analysis_search_crews = CrewPool(_analysis_search_crew)
+
+
+def warm_up():
+    for pool in (analysis_crews, search_crews, analysis_search_crews):
+        with pool.acquire():
+            pass
+
+
+def _scoped_llm():
+    # The shared LLM counts tokens for its whole lifetime; a copy with its own counters
+    # (same client) gives the usage of a single kickoff even when crews run concurrently.
+    scoped = llm.model_copy()
+    scoped._token_usage = dict.fromkeys(llm._token_usage, 0)
+    return scoped
+
+
+# Job parsers of the kickoffs that stream, keyed by their scoped LLM (the event source).
+_job_streams = {}
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_stream_chunk(source, event):
+    stream = _job_streams.get(id(source))
+    if stream is None or event.tool_call is not None:
+        return
+    parser, call_id = stream
+    if event.call_id != call_id:
+        parser.reset()
+        _job_streams[id(source)] = (parser, event.call_id)
+    parser.feed(event.chunk)
+
+
+def _search_results(output) -> JobSearchResults:
+    with metrics.span("parse:jobs") as span:
+        jobs, skipped = parse_jobs(output.raw)
+        span.attrs.update(jobs=len(jobs), skipped=len(skipped))
+        if skipped:
+            span.attrs["skipped_errors"] = " | ".join(entry.error for entry in skipped)
+    return JobSearchResults(jobs=jobs)
+
+
+def _kickoff(pool: CrewPool, stage: str, inputs: dict, callbacks, on_job=None):
+    with pool.acquire() as crew:
+        scoped = _scoped_llm()
+        if on_job is not None and STREAM_JOBS:
+            scoped.stream = True
+            _job_streams[id(scoped)] = (JobStreamParser(on_job), None)
+        for agent in crew.agents:
+            agent.llm = scoped
+        for task, callback in zip(crew.tasks, callbacks):
+            # Per-run counters live on the task; crewai re-sends the tool format every 3rd use.
+            task.used_tools = task.tools_errors = task.delegations = 0
+            task.callback = callback
+
+        _wait_llm_slot()
+        try:
+            with metrics.span(f"crew:{stage}") as span:
+                try:
+                    output = crew.kickoff(inputs=inputs)
+                finally:
+                    # A failed tool call is sent back to the agent, which calls it again.
+                    metrics.add_retries(sum(task.tools_errors for task in crew.tasks))
+                usage = scoped.get_token_usage_summary()
+                span.attrs.update(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    llm_requests=usage.successful_requests,
+                )
+        finally:
+            _job_streams.pop(id(scoped), None)
+    return output
+
+
+def _run_analysis(resume_text: str, on_analysis) -> ResumeAnalysis:
+    analysis_result = {}
+
+    def store_analysis(output):
+        analysis_result["analysis"] = output.pydantic
+        on_analysis(output.pydantic)
+
+    _kickoff(analysis_crews, "analysis", {"resume_text": resume_text}, [store_analysis])
+    return analysis_result["analysis"]
+
+
+def _run_sequential(
+    resume_text: str, analysis, on_analysis, on_jobs, min_jobs: int = 5, known_jobs=(), on_job=None,
+):
+    started = time.perf_counter()
+    marks = {}
+
+    def timed_analysis(output):
+        marks["analysis"] = time.perf_counter()
+        metrics.record("task:analyze_resume", marks["analysis"] - started)
+        on_analysis(output.pydantic)
+
+    def found_jobs(output):
+        on_jobs(_search_results(output))
+
+    if analysis is None:
+        inputs = {"resume_text": resume_text, **_search_inputs(min_jobs=min_jobs, known_jobs=known_jobs)}
+        _kickoff(analysis_search_crews, "analysis+search", inputs, [timed_analysis, found_jobs], on_job)
+    else:
+        inputs = _search_inputs(analysis, min_jobs=min_jobs, known_jobs=known_jobs)
+        _kickoff(search_crews, "search", inputs, [found_jobs], on_job)
+
+    metrics.record("task:search_jobs", time.perf_counter() - marks.get("analysis", started))
+
+
+def _run_fanout(resume_text: str, analysis, on_analysis, on_jobs, platforms=None, on_job=None):
+    if analysis is None:
+        analysis = _run_analysis(resume_text, on_analysis)
+
+    def run_one(sub_search: SubSearch) -> JobSearchResults:
+        found = {}
+        _kickoff(
+            search_crews, f"search:{sub_search.platform}", _search_inputs(analysis, sub_search),
+            [lambda output: found.setdefault("results", _search_results(output))],
+            on_job,
+        )
+        return found["results"]
+
+    def emit_partial(results: JobSearchResults):
+        on_jobs(results, partial=True)
+
+    merged = run_fanout(plan_sub_searches(analysis, platforms), run_one, on_result=emit_partial)
+    on_jobs(merged)
+
+
+def _store_results(results: JobSearchResults, known_jobs=()) -> JobSearchResults:
+    if ENRICH:
+        results = JobSearchResults(jobs=enrich_jobs(results.jobs))
+    with metrics.span("index_write", jobs=len(results.jobs)):
+        job_store.add(results.jobs)
+    with metrics.span("dedup", jobs=len(known_jobs) + len(results.jobs)) as span:
+        results = JobSearchResults(jobs=deduplicate(list(known_jobs) + results.jobs))
+        span.attrs["unique_jobs"] = len(results.jobs)
+    return results
+
+
+def search_only(
+    analysis: ResumeAnalysis,
+    fanout: bool = FANOUT,
+    platforms: list[str] | None = None,
+    trace: metrics.Trace | None = None,
+) -> JobSearchResults:
+    trace = trace or metrics.Trace()
+    context = contextvars.copy_context()
+    context.run(metrics.current_trace.set, trace)
+    state = {}
+
+    def on_jobs(results: JobSearchResults, partial: bool = False):
+        if not partial:
+            state["results"] = results
+
+    def run():
+        with metrics.span("index_search") as span:
+            local_jobs = job_store.search(analysis, limit=MIN_LOCAL_RESULTS)
+            span.attrs["jobs"] = len(local_jobs)
+        if fanout:
+            _run_fanout("", analysis, None, on_jobs, platforms)
+        else:
+            _run_sequential("", analysis, None, on_jobs)
+        return _store_results(state["results"], local_jobs)
+
+    try:
+        return context.run(run)
+    finally:
+        metrics.export(trace)
+
+
+def search_jobs_stream(
+    resume_text: str,
+    use_cache: bool = True,
+    analysis_mode: str = ANALYSIS_MODE,
+    fanout: bool = FANOUT,
+    platforms: list[str] | None = None,
+    local_first: bool = LOCAL_FIRST,
+    trace: metrics.Trace | None = None,
+):
+    if analysis_mode not in ANALYSIS_MODES:
+        raise ValueError(f"analysis_mode must be one of {ANALYSIS_MODES}, got {analysis_mode!r}")
+
+    trace = trace or metrics.Trace()
+    context = contextvars.copy_context()
+    context.run(metrics.current_trace.set, trace)
+
+    cache_key = resume_cache_key(resume_text, analysis_mode)
+    analysis = None
+    if use_cache and analysis_mode != "local":
+        with trace.span("analysis_cache") as span:
+            cached = resume_cache.get(cache_key)
+            span.attrs["hit"] = cached is not None
+        if cached is not None:
+            analysis = ResumeAnalysis.model_validate_json(cached)
+
+    if analysis is None and analysis_mode != "llm":
+        analysis = context.run(analyze_resume_fast, resume_text, analysis_mode)
+        if analysis_mode == "hybrid":
+            resume_cache.set(cache_key, analysis.model_dump_json())
+
+    events = queue.Queue()
+    state = {"analysis": analysis}
+
+    def on_analysis(result: ResumeAnalysis):
+        state["analysis"] = result
+        resume_cache.set(cache_key, result.model_dump_json())
+        events.put(SearchEvent(ANALYSIS_READY, result))
+
+    emitted = set()
+    emitted_lock = threading.Lock()
+    local_jobs = []
+
+    def emit_jobs(jobs):
+        for job in jobs:
+            key = fingerprint(job)
+            with emitted_lock:
+                if key in emitted:
+                    continue
+                emitted.add(key)
+            events.put(SearchEvent(JOB_FOUND, job))
+
+    def on_job(job):
+        emit_jobs([job])
+
+    def on_jobs(results: JobSearchResults, partial: bool = False):
+        if partial:
+            emit_jobs(deduplicate(results.jobs))
+            return
+
+        results = _store_results(results, local_jobs)
+        emit_jobs(results.jobs)
+        state["results"] = results
+
+    def run():
+        try:
+            current = analysis
+            known_jobs = []
+            if local_first:
+                if current is None:
+                    current = _run_analysis(resume_text, on_analysis)
+                with metrics.span("index_search") as span:
+                    local_jobs.extend(job_store.search(current, limit=MIN_LOCAL_RESULTS))
+                    span.attrs["jobs"] = len(local_jobs)
+                emit_jobs(local_jobs)
+                known_jobs = local_jobs
+
+            shortfall = MIN_LOCAL_RESULTS - len(local_jobs)
+            if local_first and shortfall <= 0:
+                state["results"] = JobSearchResults(jobs=list(local_jobs))
+            elif fanout and not local_first:
+                _run_fanout(resume_text, current, on_analysis, on_jobs, platforms, on_job=on_job)
+            else:
+                # With local-first the agent only tops up the shortfall, in one call even with fan-out on.
+                _run_sequential(
+                    resume_text, current, on_analysis, on_jobs,
+                    min_jobs=shortfall if local_first else 5, known_jobs=known_jobs, on_job=on_job,
+                )
+        except Exception as e:
+            metrics.export(trace)
+            events.put(SearchEvent(_FAILED, e))
+        else:
+            metrics.export(trace)
+            events.put(SearchEvent(DONE, (state["analysis"], state["results"])))
+
+    if analysis is not None:
+        yield SearchEvent(ANALYSIS_READY, analysis)
+
+    threading.Thread(target=context.run, args=(run,), daemon=True).start()
+
+    while True:
+        event = events.get()
+        if event.kind == _FAILED:
+            raise event.data
+        yield event
+        if event.kind == DONE:
+            return
+
+
+def search_jobs(
+    resume_text: str,
+    use_cache: bool = True,
+    analysis_mode: str = ANALYSIS_MODE,
+    fanout: bool = FANOUT,
+    platforms: list[str] | None = None,
+    local_first: bool = LOCAL_FIRST,
+    trace: metrics.Trace | None = None,
+):
+    stream = search_jobs_stream(
+        resume_text,
+        use_cache=use_cache,
+        analysis_mode=analysis_mode,
+        fanout=fanout,
+        platforms=platforms,
+        local_first=local_first,
+        trace=trace,
+    )
+    for event in stream:
+        if event.kind == DONE:
+            return event.data
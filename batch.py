@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import metrics
+from agents import ANALYSIS_MODE, ANALYSIS_MODES, search_jobs
+from extraction import DOCX_MIME, PDF_MIME, extract_resume_text
+from ratelimit import backoff, is_transient
+
+MIME_TYPES = {".pdf": PDF_MIME, ".docx": DOCX_MIME}
+
+
+def iter_resumes(source: str):
+    if os.path.isdir(source):
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            # The extension stays in the id so cv.pdf and cv.docx do not overwrite each other.
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in MIME_TYPES:
+                yield {"id": entry.name, "path": entry.path}
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            path = item["path"]
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            yield {"id": str(item.get("id") or os.path.basename(path)), "path": path}
+
+
+def load_checkpoint(path: str) -> set[str]:
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("status") == "done":
+                    done.add(entry["id"])
+    return done
+
+
+def write_json(path: str, payload: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_resume(item: dict) -> str:
+    ext = os.path.splitext(item["path"])[1].lower()
+    with open(item["path"], "rb") as f:
+        resume_text = extract_resume_text(f.read(), MIME_TYPES.get(ext, ""))
+    if not resume_text:
+        raise ValueError("não foi possível extrair texto do arquivo")
+    return resume_text
+
+
+def process_resume(item: dict, resume_text: str, analysis_mode: str, fanout: bool) -> dict:
+    start = time.perf_counter()
+    analysis, job_results = search_jobs(resume_text, analysis_mode=analysis_mode, fanout=fanout)
+    return {
+        "id": item["id"],
+        "source": item["path"],
+        "analysis": analysis.model_dump(),
+        "jobs": [job.model_dump() for job in job_results.jobs],
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+
+
+async def with_retries(func, retries: int, base_delay: float):
+    # LLM and Serper calls already retry on their own; this only reruns a search that still
+    # failed for a transient reason (rate limit, 5xx, timeout). Anything else fails at once.
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.to_thread(func)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            metrics.registry.count_retry("search")
+            await asyncio.sleep(backoff(attempt, base_delay))
+
+
+class Progress:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return 60 * self.done / elapsed if elapsed else 0.0
+
+    def report(self, prefix: str = ""):
+        print(
+            f"{prefix}{self.done} concluídos, {self.failed} com erro, {self.skipped} já processados "
+            f"({self.per_minute():.1f} currículos/min)",
+            flush=True,
+        )
+
+
+async def run_batch(
+    source: str,
+    output_dir: str,
+    concurrency: int = 4,
+    checkpoint: str | None = None,
+    analysis_mode: str = ANALYSIS_MODE,
+    fanout: bool = False,
+    retries: int = 3,
+    base_delay: float = 2.0,
+    report_every: int = 10,
+) -> Progress:
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = checkpoint or os.path.join(output_dir, "checkpoint.jsonl")
+    done_ids = load_checkpoint(checkpoint)
+    progress = Progress()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    with open(checkpoint, "a", encoding="utf-8") as checkpoint_file:
+        def record(item_id: str, status: str, error: str | None = None):
+            entry = {"id": item_id, "status": status, "at": time.time()}
+            if error:
+                entry["error"] = error
+            checkpoint_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            checkpoint_file.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                try:
+                    resume_text = await asyncio.to_thread(read_resume, item)
+                    result = await with_retries(
+                        lambda: process_resume(item, resume_text, analysis_mode, fanout), retries, base_delay,
+                    )
+                    write_json(os.path.join(output_dir, f"{item['id']}.json"), result)
+                    record(item["id"], "done")
+                    progress.done += 1
+                except Exception as e:
+                    record(item["id"], "failed", str(e))
+                    progress.failed += 1
+                    print(f"Erro em {item['id']}: {e}", file=sys.stderr, flush=True)
+
+                if (progress.done + progress.failed) % report_every == 0:
+                    progress.report()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for item in iter_resumes(source):
+            if item["id"] in done_ids:
+                progress.skipped += 1
+                continue
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    progress.report("Finalizado: ")
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processa um diretório ou manifesto JSONL de currículos.")
+    parser.add_argument("source", help="diretório com PDFs/DOCX ou manifesto .jsonl com {\"id\", \"path\"}")
+    parser.add_argument("-o", "--output", default="results", help="diretório dos resultados JSON")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--checkpoint", help="arquivo de checkpoint (padrão: <output>/checkpoint.jsonl)")
+    parser.add_argument("--analysis-mode", choices=ANALYSIS_MODES, default=ANALYSIS_MODE)
+    parser.add_argument("--fanout", action="store_true", help="usa a busca em paralelo por plataforma")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args()
+
+    metrics.start_metrics_server()
+    asyncio.run(run_batch(
+        args.source,
+        args.output,
+        concurrency=args.concurrency,
+        checkpoint=args.checkpoint,
+        analysis_mode=args.analysis_mode,
+        fanout=args.fanout,
+        retries=args.retries,
+    ))
+
+
+if __name__ == "__main__":
+    main()
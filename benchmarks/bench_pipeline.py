@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(workdir: str):
+    # Must run before agents/cache are imported: their settings are read at import time.
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    os.environ.setdefault("SERPER_API_KEY", "offline")
+    os.environ.setdefault("OPENSCOUT_RPM_OPENAI", "1000000")
+    os.environ.setdefault("OPENSCOUT_RPM_SERPER", "1000000")
+    os.environ["OPENSCOUT_CACHE_DIR"] = workdir
+    os.environ["OPENSCOUT_JOB_STORE"] = os.path.join(workdir, "jobs.sqlite3")
+    os.environ["OPENSCOUT_METRICS_PATH"] = ""
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(q: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    return {
+        "mean": statistics.fmean(values),
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": values[-1],
+    }
+
+
+def peak_memory_mb() -> dict:
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _import_seconds(module: str) -> float:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT_DIR,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(repeat: int) -> dict:
+    # "main" is the Streamlit page; importing it runs one render in bare mode.
+    return {
+        "page_import_seconds": percentiles([_import_seconds("main") for _ in range(repeat)]),
+        "agents_import_seconds": percentiles([_import_seconds("agents") for _ in range(repeat)]),
+    }
+
+
+def bench_extraction(documents: list[dict], repeat: int) -> dict:
+    from extraction import extract_resume_text
+
+    by_format = {}
+    total_pages = 0
+    total_seconds = 0.0
+    for _ in range(repeat):
+        for document in documents:
+            start = time.perf_counter()
+            extract_resume_text(document["data"], document["mime"])
+            elapsed = time.perf_counter() - start
+            by_format.setdefault(document["format"], []).append(elapsed * 1000)
+            total_pages += document["pages"]
+            total_seconds += elapsed
+
+    return {
+        "documents": len(documents) * repeat,
+        "pages_per_second": total_pages / total_seconds if total_seconds else 0.0,
+        "by_format_ms": {name: percentiles(ms) for name, ms in sorted(by_format.items())},
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+
+def _timed_search(resume_text: str, analysis_mode: str, fanout: bool) -> tuple[float, dict, float]:
+    import metrics
+    from agents import JOB_FOUND, search_jobs_stream
+
+    trace = metrics.Trace()
+    start = time.perf_counter()
+    first_job = None
+    stream = search_jobs_stream(
+        resume_text, use_cache=False, analysis_mode=analysis_mode, fanout=fanout, local_first=False, trace=trace,
+    )
+    for event in stream:
+        if event.kind == JOB_FOUND and first_job is None:
+            first_job = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return elapsed, trace.totals(), first_job if first_job is not None else elapsed
+
+
+def bench_latency(resumes: list[str], analysis_mode: str, fanout: bool) -> dict:
+    seconds, first_job, tokens, tool_calls = [], [], [], []
+    for resume_text in resumes:
+        elapsed, totals, first = _timed_search(resume_text, analysis_mode, fanout)
+        seconds.append(elapsed)
+        first_job.append(first)
+        tokens.append(totals.get("prompt_tokens", 0) + totals.get("completion_tokens", 0))
+        tool_calls.append(totals.get("tool_calls", 0))
+
+    return {
+        "searches": len(resumes),
+        "seconds": percentiles(seconds),
+        "first_job_seconds": percentiles(first_job),
+        "tokens_per_search": statistics.fmean(tokens),
+        "tool_calls_per_search": statistics.fmean(tool_calls),
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+
+def bench_throughput(resumes: list[str], sessions: int, analysis_mode: str, fanout: bool) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        results = list(executor.map(lambda text: _timed_search(text, analysis_mode, fanout), resumes))
+    wall = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "searches": len(resumes),
+        "wall_seconds": wall,
+        "searches_per_minute": 60 * len(resumes) / wall,
+        "seconds": percentiles([elapsed for elapsed, _, _ in results]),
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+
+def run(args) -> dict:
+    configure_environment(tempfile.mkdtemp(prefix="openscout-bench-"))
+
+    from agents import ANALYSIS_MODE
+    from benchmarks.bench_skills import generate_corpus
+    from benchmarks.corpus import generate_documents
+    from benchmarks.fakes import FakeLLM, FakeSerperServer, install
+    from search_tool import serper_client
+
+    analysis_mode = args.analysis_mode or ANALYSIS_MODE
+    results = {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+    }
+
+    results["startup"] = bench_startup(args.repeat)
+
+    documents = generate_documents(args.documents, args.seed)
+    results["extraction"] = bench_extraction(documents, args.repeat)
+
+    resumes = [sample["text"] for sample in generate_corpus(max(args.searches, 1), args.seed)]
+    with FakeSerperServer(args.serper_latency, args.serper_jitter, seed=args.seed) as serper:
+        install(FakeLLM(model="fake", latency=args.llm_latency, jitter=args.llm_jitter), serper)
+
+        results["latency"] = bench_latency(resumes[:args.searches], analysis_mode, args.fanout)
+        results["throughput"] = [
+            bench_throughput(resumes[:args.searches], sessions, analysis_mode, args.fanout)
+            for sessions in args.sessions
+        ]
+        results["serper"] = {**serper_client.stats(), "requests": serper.requests}
+        results["job_pages"] = {"requests": serper.page_requests, "not_modified": serper.not_modified}
+
+        # Same searches with instant fakes: what is left is per-request setup and framework overhead.
+        serper.latency = serper.jitter = 0
+        install(FakeLLM(model="fake", latency=0, jitter=0), serper)
+        results["overhead"] = bench_latency(resumes[:args.searches], analysis_mode, args.fanout)
+
+    results["peak_memory_mb"] = peak_memory_mb()
+    return results
+
+
+def _flatten(value, prefix: str = "") -> dict:
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+        return flat
+    if isinstance(value, list):
+        flat = {}
+        for i, item in enumerate(value):
+            flat.update(_flatten(item, f"{prefix}{i}."))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix.rstrip("."): value}
+    return {}
+
+
+def compare(results: dict, baseline: dict):
+    current, previous = _flatten(results), _flatten(baseline)
+    print(f"Comparação com {baseline.get('commit', '?')}:")
+    for key in sorted(current.keys() & previous.keys()):
+        if key.startswith(("parameters.", "created_at")) or not previous[key]:
+            continue
+        change = 100 * (current[key] - previous[key]) / abs(previous[key])
+        print(f"  {key}: {previous[key]:.4g} -> {current[key]:.4g} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline completo com LLM e Serper simulados.")
+    parser.add_argument("--searches", type=int, default=20, help="buscas por medição")
+    parser.add_argument("--sessions", type=lambda s: [int(n) for n in s.split(",")], default=[1, 4, 16],
+                        help="sessões simultâneas, separadas por vírgula")
+    parser.add_argument("--documents", type=int, default=40, help="PDFs/DOCX gerados para a extração")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições da extração sobre o corpus")
+    parser.add_argument("--analysis-mode", choices=("llm", "hybrid", "local"))
+    parser.add_argument("--fanout", action="store_true")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--serper-latency", type=float, default=0.3)
+    parser.add_argument("--serper-jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="JSON de saída (padrão: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--baseline", help="resultado anterior para comparação")
+    args = parser.parse_args()
+
+    results = run(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    summary = ("startup", "extraction", "latency", "throughput", "overhead")
+    print(json.dumps({key: results[key] for key in summary}, indent=2))
+    print(f"Resultados salvos em {output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
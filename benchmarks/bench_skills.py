@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from skills import TAXONOMY_PATH, analyze_resume_locally, load_extractor
+
+# Hand-written resumes labelled by reading them, independent of skills_taxonomy.json:
+# tools missing from the taxonomy count as misses, and the synthetic corpus cannot show that.
+FIXED_CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixed_resumes.json")
+
+FILLER = [
+    "Atuei no desenvolvimento de sistemas de alta disponibilidade para clientes do setor financeiro.",
+    "Responsável pela manutenção de APIs, revisão de pull requests e mentoria de novos integrantes.",
+    "Participei da migração de sistemas legados, reduzindo custos de infraestrutura.",
+    "Worked closely with product managers to deliver features on a two-week cadence.",
+    "Colaborei com times multidisciplinares em projetos de transformação digital.",
+    "Implementei melhorias de observabilidade e reduzi o tempo médio de resolução de incidentes.",
+]
+LEVEL_LINES = {
+    "Junior": ["Desenvolvedor Júnior", "2023 - atual", "Estágio em desenvolvimento 2022 - 2023"],
+    "Pleno": ["Desenvolvedor Pleno", "4 anos de experiência", "2021 - atual"],
+    "Senior": ["Engenheiro de Software Sênior", "10 anos de experiência", "2014 - atual"],
+}
+
+
+def _surface(rng: random.Random, canonical: str, aliases: list[str], case_sensitive: set[str]) -> str:
+    options = [canonical] + [alias for alias in aliases if alias.lower() not in case_sensitive]
+    surface = rng.choice(options)
+    if surface == canonical or surface.lower() in case_sensitive:
+        return surface
+    return rng.choice([surface, surface.lower(), surface.title()])
+
+
+def generate_corpus(n_resumes: int, seed: int = 42):
+    with open(TAXONOMY_PATH, encoding="utf-8") as f:
+        taxonomy = json.load(f)
+    case_sensitive = {surface.lower() for surface in taxonomy["case_sensitive"]}
+    skills = list(taxonomy["skills"].items())
+    languages = list(taxonomy["languages"].items())
+
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_resumes):
+        level = rng.choice(list(LEVEL_LINES))
+        resume_skills = rng.sample(skills, rng.randint(8, 30))
+        resume_languages = rng.sample(languages, rng.randint(1, 3))
+
+        lines = [f"Candidato {i}", rng.choice(LEVEL_LINES[level]), "Resumo"]
+        lines += rng.sample(FILLER, 3)
+        lines.append("Habilidades:")
+        lines.append(", ".join(_surface(rng, name, aliases, case_sensitive) for name, aliases in resume_skills))
+        lines.append("Experiência")
+        lines += rng.sample(FILLER, 4)
+        lines.append("Idiomas:")
+        lines.append(", ".join(_surface(rng, name, aliases, case_sensitive) for name, aliases in resume_languages))
+
+        corpus.append({
+            "text": "\n".join(lines),
+            "skills": {name for name, _ in resume_skills},
+            "languages": {name for name, _ in resume_languages},
+            "experience_level": level,
+        })
+    return corpus
+
+
+# Known false-positive traps in the fixed corpus: these skills must never be extracted from that resume.
+TRAPS = {"ml-engineer-senior": {"C"}}
+
+
+def load_fixed_corpus(path: str = FIXED_CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [
+            {
+                "id": sample["id"],
+                "text": "\n".join(sample["lines"]),
+                "skills": set(sample["skills"]),
+                "languages": set(sample["languages"]),
+                "experience_level": sample["experience_level"],
+            }
+            for sample in json.load(f)
+        ]
+
+
+def evaluate(corpus) -> dict:
+    timings = []
+    true_positives = false_positives = false_negatives = 0
+    level_hits = 0
+    errors = {}
+    for sample in corpus:
+        start = time.perf_counter()
+        analysis, _ = analyze_resume_locally(sample["text"])
+        timings.append((time.perf_counter() - start) * 1000)
+
+        found = set(analysis.skills) | set(analysis.languages)
+        expected = sample["skills"] | sample["languages"]
+        true_positives += len(found & expected)
+        false_positives += len(found - expected)
+        false_negatives += len(expected - found)
+        level_hits += analysis.experience_level == sample["experience_level"]
+        if "id" in sample:
+            error = {"missed": sorted(expected - found), "spurious": sorted(found - expected)}
+            if analysis.experience_level != sample["experience_level"]:
+                error["experience_level"] = f"{analysis.experience_level} (esperado {sample['experience_level']})"
+            error = {key: value for key, value in error.items() if value}
+            if error:
+                errors[sample["id"]] = error
+
+    timings.sort()
+    result = {
+        "resumes": len(corpus),
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[int(len(timings) * 0.95)],
+        "resumes_per_second": 1000 * len(timings) / sum(timings),
+        "precision": true_positives / max(true_positives + false_positives, 1),
+        "recall": true_positives / max(true_positives + false_negatives, 1),
+        "experience_level_accuracy": level_hits / len(corpus),
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def run(n_resumes: int, seed: int):
+    load_extractor()
+    result = evaluate(generate_corpus(n_resumes, seed))
+    result["fixed_corpus"] = evaluate(load_fixed_corpus())
+    check_traps(result["fixed_corpus"])
+    return result
+
+
+def check_traps(result: dict):
+    errors = result.get("errors", {})
+    failed = {
+        sample_id: sorted(trap & set(errors.get(sample_id, {}).get("spurious", [])))
+        for sample_id, trap in TRAPS.items()
+    }
+    failed = {sample_id: skills for sample_id, skills in failed.items() if skills}
+    if failed:
+        raise AssertionError(f"armadilhas extraídas no corpus fixo: {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do extrator local de habilidades.")
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.resumes, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
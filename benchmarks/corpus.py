@@ -0,0 +1,82 @@
+import io
+import random
+
+from docx import Document
+
+from benchmarks.bench_skills import FILLER, generate_corpus
+from extraction import DOCX_MIME, PDF_MIME
+
+LINES_PER_PAGE = 45
+PAGE_COUNTS = (1, 2, 3, 12)
+
+
+def _escape_pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = len(objects) + 2 * len(pages) + 1
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 14 TL 50 800 Td"]
+        ops += [f"({_escape_pdf_text(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", errors="replace")
+        contents = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, contents)
+        ))
+    add(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) + b"] /Count %d >>" % len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return out
+
+
+def make_docx(pages: list[list[str]]) -> bytes:
+    document = Document()
+    for number, lines in enumerate(pages):
+        if number:
+            document.add_page_break()
+        for line in lines:
+            document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _paginate(text: str, n_pages: int, rng: random.Random) -> list[list[str]]:
+    lines = text.splitlines()
+    while len(lines) < n_pages * LINES_PER_PAGE:
+        lines.append(rng.choice(FILLER))
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, n_pages * LINES_PER_PAGE, LINES_PER_PAGE)]
+
+
+def generate_documents(n_documents: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    documents = []
+    for i, sample in enumerate(generate_corpus(n_documents, seed)):
+        n_pages = rng.choice(PAGE_COUNTS)
+        pages = _paginate(sample["text"], n_pages, rng)
+        if i % 2:
+            name, mime, data = "docx", DOCX_MIME, make_docx(pages)
+        else:
+            name, mime, data = "pdf", PDF_MIME, make_pdf(pages)
+        documents.append({"name": f"resume-{i}.{name}", "format": name, "mime": mime, "pages": n_pages, "data": data})
+    return documents
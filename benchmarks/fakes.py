@@ -0,0 +1,256 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crewai.llms.base_llm import BaseLLM, llm_call_context
+from pydantic import PrivateAttr
+
+from models import JobListing, JobSearchResults, ResumeAnalysis
+
+SEARCH_TOOL_NAME = "Search the internet with Serper"
+RESULT_HOST = "jobs.example.com"
+STREAM_CHUNK = 16
+_SITE = re.compile(r"site:([\w.-]+)")
+_LINK = re.compile(r"https?://[\w.:-]+/" + re.escape(RESULT_HOST) + r"/\d+/\d+")
+_COMPANY = re.compile(r'\\?"empresa\\?": \\?"(.*?)\\?"')
+
+DEFAULT_ANALYSIS = ResumeAnalysis(
+    experience_level="Senior",
+    skills=["Python", "Django", "PostgreSQL", "Docker", "AWS", "React"],
+    languages=["Português", "Inglês"],
+)
+
+TITLES = [
+    "Desenvolvedor Backend Python", "Engenheiro de Software", "Desenvolvedor Full Stack",
+    "Engenheiro de Dados", "Desenvolvedor Frontend React", "Engenheiro DevOps",
+    "Software Engineer", "Backend Engineer", "Platform Engineer", "Site Reliability Engineer",
+]
+COMPANIES = [
+    "Nubank", "iFood", "Mercado Livre", "Stone", "PicPay", "Creditas", "QuintoAndar",
+    "VTEX", "Loft", "Hotmart", "Gupy", "Olist", "CI&T", "Zup", "Wildlife",
+]
+LOCATIONS = ["Remoto", "São Paulo, SP", "Belo Horizonte, MG", "Florianópolis, SC", "Remoto (Global)"]
+PLATFORMS = ["LinkedIn", "Indeed", "Glassdoor", "Wellfound", "Remote.co", "We Work Remotely"]
+LEVELS = ["Junior", "Pleno", "Senior"]
+REQUIREMENTS = [
+    "Python", "Django", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "AWS", "React",
+    "TypeScript", "Go", "Kafka", "Terraform", "Inglês avançado", "CI/CD", "Redis",
+]
+
+
+def canned_jobs(seed: int, n_jobs: int) -> JobSearchResults:
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(n_jobs):
+        company = rng.choice(COMPANIES)
+        jobs.append(JobListing(
+            job_title=rng.choice(TITLES),
+            company=company,
+            location=rng.choice(LOCATIONS),
+            platform=rng.choice(PLATFORMS),
+            required_experience_level=rng.choice(LEVELS),
+            key_requirements=rng.sample(REQUIREMENTS, rng.randint(3, 6)),
+            contact_email=f"vagas@{company.lower().replace(' ', '').replace('&', '')}.com.br",
+        ))
+    return JobSearchResults(jobs=jobs)
+
+
+def _sleep(rng: random.Random, latency: float, jitter: float):
+    delay = latency + rng.uniform(-jitter, jitter)
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeLLM(BaseLLM):
+    latency: float = 0.5
+    jitter: float = 0.1
+    jobs_per_answer: int = 5
+    analysis: ResumeAnalysis = DEFAULT_ANALYSIS
+    jobs: JobSearchResults | None = None
+    use_tools: bool = True
+    _rng: random.Random = PrivateAttr(default_factory=lambda: random.Random(0))
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        prompt = messages if isinstance(messages, str) else json.dumps(messages, ensure_ascii=False)
+        with self._rng_lock:
+            rng = random.Random(self._rng.random())
+
+        if "Caçador de vagas" in prompt:
+            answer = self._search_answer(prompt)
+        elif "Classifique o nível de experiência" in prompt:
+            answer = self.analysis.experience_level
+        elif "Escreva um email de candidatura" in prompt:
+            answer = self._email_answer(prompt)
+        else:
+            answer = self._final(self.analysis.model_dump_json())
+
+        with llm_call_context():
+            if self.stream:
+                self._stream(answer, rng, from_task, from_agent)
+            else:
+                _sleep(rng, self.latency, self.jitter)
+
+        self._track_token_usage_internal({
+            "prompt_tokens": _estimate_tokens(prompt),
+            "completion_tokens": _estimate_tokens(answer),
+            "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(answer),
+        })
+        return answer
+
+    def _stream(self, answer: str, rng: random.Random, from_task, from_agent):
+        # A fifth of the latency before the first token, the rest spread over the chunks.
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        chunks = [answer[i:i + STREAM_CHUNK] for i in range(0, len(answer), STREAM_CHUNK)]
+        time.sleep(delay * 0.2)
+        for chunk in chunks:
+            time.sleep(delay * 0.8 / len(chunks))
+            self._emit_stream_chunk_event(chunk, from_task=from_task, from_agent=from_agent)
+
+    def _search_answer(self, prompt: str) -> str:
+        if self.use_tools and RESULT_HOST not in prompt:
+            query = "vagas " + " ".join(self.analysis.skills[:3])
+            site = _SITE.search(prompt)
+            if site:
+                query += f" site:{site.group(1)}"
+            return (
+                "Thought: Preciso buscar vagas para o candidato.\n"
+                f"Action: {SEARCH_TOOL_NAME}\n"
+                f"Action Input: {json.dumps({'search_query': query}, ensure_ascii=False)}"
+            )
+        results = self.jobs or canned_jobs(zlib.crc32(prompt.encode("utf-8")), self.jobs_per_answer)
+        links = list(dict.fromkeys(_LINK.findall(prompt)))
+        if links and self.jobs is None:
+            results = JobSearchResults(jobs=[
+                job.model_copy(update={"url": link}) for job, link in zip(results.jobs, links)
+            ])
+        return self._final(results.model_dump_json())
+
+    def _email_answer(self, prompt: str) -> str:
+        company = _COMPANY.search(prompt)
+        company = company.group(1) if company else "a empresa"
+        skills = ", ".join(self.analysis.skills[:3])
+        return json.dumps({
+            "subject": f"Candidatura - {company}",
+            "body": f"Olá, equipe {company}.\n\nTenho interesse na vaga e experiência com {skills}.\n\nAtenciosamente.",
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _final(payload: str) -> str:
+        return f"Thought: I now know the final answer\nFinal Answer: {payload}"
+
+
+class _SerperHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        try:
+            seed, index = (int(part) for part in self.path.split("/")[-2:])
+            job = canned_jobs(seed, server.n_results).jobs[index]
+        except (ValueError, IndexError):
+            self.send_error(404)
+            return
+        with server.lock:
+            server.page_requests += 1
+            rng = random.Random(server.rng.random())
+        _sleep(rng, server.latency, server.jitter)
+
+        etag = f'"{seed}-{index}"'
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        body = (
+            f"<html><body><h1>{job.job_title}</h1><p>{job.company} - {job.location}</p>"
+            f"<p>Envie seu currículo para <a href=\"mailto:{job.contact_email}?subject=Vaga\">"
+            f"{job.contact_email}</a></p></body></html>"
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        query = json.loads(self.rfile.read(length) or b"{}").get("q", "")
+        with server.lock:
+            server.requests += 1
+            rng = random.Random(server.rng.random())
+        _sleep(rng, server.latency, server.jitter)
+
+        organic = [
+            {
+                "title": f"{job.job_title} - {job.company}",
+                "link": f"{server.url}/{RESULT_HOST}/{zlib.crc32(query.encode('utf-8'))}/{i}",
+                "snippet": f"{job.location}. Requisitos: {', '.join(job.key_requirements)}.",
+            }
+            for i, job in enumerate(canned_jobs(zlib.crc32(query.encode("utf-8")), server.n_results).jobs)
+        ]
+        body = json.dumps({"organic": organic}, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSerperServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.05, n_results: int = 10, seed: int = 0):
+        super().__init__(("127.0.0.1", 0), _SerperHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.n_results = n_results
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.page_requests = 0
+        self.not_modified = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def install(llm: FakeLLM, serper: FakeSerperServer):
+    import agents
+    import search_tool
+
+    agents.llm = llm
+    search_tool.serper_client.base_url = serper.url
@@ -0,0 +1,140 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from models import JobListing
+
+NUM_PERM = 64
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+_NON_WORD = re.compile(r"[^\w+#]+")
+_COMPANY_SUFFIXES = re.compile(r"\b(ltda|ltd|inc|llc|s ?a|sa|me|eireli|gmbh|corp|corporation|co)\b")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def normalize_company(company: str) -> str:
+    return " ".join(_COMPANY_SUFFIXES.sub(" ", normalize(company)).split())
+
+
+def fingerprint(job: JobListing) -> str:
+    key = "\0".join((normalize(job.job_title), normalize_company(job.company), normalize(job.location)))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def shingles(job: JobListing) -> set[str]:
+    words = normalize(job.job_title).split()
+    result = {f"t:{a} {b}" for a, b in zip(words, words[1:])} or {f"t:{w}" for w in words}
+    result.update(f"r:{normalize(req)}" for req in job.key_requirements if req.strip())
+    return result
+
+
+def minhash(features: set[str]) -> np.ndarray:
+    if not features:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint64, count=len(features),
+    )
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & np.uint64(_MAX_HASH)
+    return permuted.min(axis=0)
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _unique(values):
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def merge_jobs(jobs: list[JobListing]) -> JobListing:
+    primary = jobs[0]
+    platforms = _unique(p for job in jobs for p in (job.platforms or [job.platform]))
+    emails = _unique(e for job in jobs for e in (job.contact_emails or [job.contact_email]))
+    verified = [job for job in jobs if job.contact_verified]
+    requirements = {}
+    for job in jobs:
+        for req in job.key_requirements:
+            requirements.setdefault(normalize(req), req)
+
+    return primary.model_copy(update={
+        "platform": primary.platform or (platforms[0] if platforms else ""),
+        "platforms": platforms,
+        "contact_email": (
+            verified[0].contact_email if verified else primary.contact_email or (emails[0] if emails else "")
+        ),
+        "contact_emails": emails,
+        "contact_verified": bool(verified),
+        "key_requirements": list(requirements.values()),
+        "url": primary.url or next((job.url for job in jobs if job.url), ""),
+    })
+
+
+def find_duplicate_groups(jobs: list[JobListing], threshold: float = SIMILARITY_THRESHOLD) -> list[list[int]]:
+    groups = _UnionFind(len(jobs))
+
+    by_fingerprint = {}
+    for i, job in enumerate(jobs):
+        first = by_fingerprint.setdefault(fingerprint(job), i)
+        if first != i:
+            groups.union(first, i)
+
+    representatives = [i for i in by_fingerprint.values()]
+    signatures = {i: minhash(shingles(jobs[i])) for i in representatives}
+    # Same company in another location is a distinct posting, so location is part of the bucket key.
+    scopes = {i: (normalize_company(jobs[i].company), normalize(jobs[i].location)) for i in representatives}
+
+    rows = NUM_PERM // BANDS
+    buckets = defaultdict(list)
+    for i in representatives:
+        bands = signatures[i].reshape(BANDS, rows)
+        for band, values in enumerate(bands):
+            buckets[(*scopes[i], band, values.tobytes())].append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                similarity = np.mean(signatures[pair[0]] == signatures[pair[1]])
+                if similarity >= threshold:
+                    groups.union(*pair)
+
+    grouped = defaultdict(list)
+    for i in range(len(jobs)):
+        grouped[groups.find(i)].append(i)
+    return sorted(grouped.values())
+
+
+def deduplicate(jobs: list[JobListing], threshold: float = SIMILARITY_THRESHOLD) -> list[JobListing]:
+    return [merge_jobs([jobs[i] for i in group]) for group in find_duplicate_groups(jobs, threshold)]
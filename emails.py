@@ -0,0 +1,296 @@
+import argparse
+import contextvars
+import json
+import os
+import random
+import re
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import NamedTuple
+
+from pydantic import BaseModel
+
+import metrics
+from models import JobApplicationEmail, JobListing, ResumeAnalysis
+from ratelimit import RateLimiter, get_limiter
+
+EMAIL_WORKERS = int(os.getenv("OPENSCOUT_EMAIL_WORKERS", 4))
+SUMMARY_SKILLS = 12
+
+SMTP_HOST = os.getenv("OPENSCOUT_SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("OPENSCOUT_SMTP_PORT", 587))
+SMTP_USER = os.getenv("OPENSCOUT_SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("OPENSCOUT_SMTP_PASSWORD", "")
+SMTP_SENDER = os.getenv("OPENSCOUT_SMTP_SENDER", SMTP_USER)
+SMTP_STARTTLS = os.getenv("OPENSCOUT_SMTP_STARTTLS", "1").lower() in ("1", "true", "yes")
+SMTP_RPM = float(os.getenv("OPENSCOUT_SMTP_RPM", 20))
+
+EMAIL_PROMPT = (
+    "Escreva um email de candidatura personalizado para a vaga abaixo.\n"
+    "- Escreva no idioma do candidato mais adequado à vaga (português para vagas no Brasil, "
+    "inglês para vagas internacionais se o candidato falar inglês).\n"
+    "- Destaque as 2 ou 3 habilidades do candidato mais relevantes para os requisitos da vaga.\n"
+    "- Estrutura: assunto claro e específico; saudação e a vaga pretendida; breve apresentação com nível "
+    "de experiência; habilidades relevantes; interesse pela empresa e compatibilidade de localização; "
+    "encerramento com chamada para conversa.\n"
+    "- Tom profissional, confiante e objetivo, em 3 a 4 parágrafos.\n"
+    "Responda apenas com um objeto JSON com as chaves subject e body.\n\n"
+    "Perfil do candidato: {summary}\n"
+    "Vaga: {job}"
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+class EmailDraft(BaseModel):
+    subject: str
+    body: str
+
+
+class WrittenEmail(NamedTuple):
+    job: JobListing
+    email: JobApplicationEmail | None
+    error: str | None
+
+
+class SendResult(NamedTuple):
+    email: JobApplicationEmail
+    ok: bool
+    attempts: int
+    error: str | None
+
+
+def recipient(job: JobListing) -> str:
+    # Only addresses confirmed on the posting page; the model's own guesses are never emailed.
+    return job.contact_email if job.contact_verified else ""
+
+
+def profile_summary(analysis: ResumeAnalysis, max_skills: int = SUMMARY_SKILLS) -> str:
+    return (
+        f"Nível: {analysis.experience_level}. "
+        f"Habilidades: {', '.join(analysis.skills[:max_skills])}. "
+        f"Idiomas: {', '.join(analysis.languages)}."
+    )
+
+
+def _job_brief(job: JobListing) -> str:
+    return json.dumps({
+        "titulo": job.job_title,
+        "empresa": job.company,
+        "local": job.location,
+        "nivel": job.required_experience_level,
+        "requisitos": job.key_requirements,
+    }, ensure_ascii=False)
+
+
+def _parse_draft(answer) -> EmailDraft:
+    if isinstance(answer, EmailDraft):
+        return answer
+    if isinstance(answer, BaseModel):
+        return EmailDraft.model_validate(answer.model_dump())
+    match = _JSON_OBJECT.search(str(answer))
+    if match is None:
+        raise ValueError("resposta do LLM sem objeto JSON")
+    return EmailDraft.model_validate_json(match.group(0))
+
+
+def write_email(job: JobListing, summary: str) -> JobApplicationEmail:
+    import agents
+
+    get_limiter("openai").wait()
+    with metrics.span("email:write", company=job.company):
+        answer = agents.llm.call(
+            [{"role": "user", "content": EMAIL_PROMPT.format(summary=summary, job=_job_brief(job))}],
+            response_model=EmailDraft,
+        )
+    draft = _parse_draft(answer)
+    return JobApplicationEmail(
+        job_title=job.job_title,
+        company=job.company,
+        recipient_email=recipient(job),
+        subject=draft.subject.strip(),
+        body=draft.body.strip(),
+    )
+
+
+def write_emails(analysis: ResumeAnalysis, jobs: list[JobListing], max_workers: int = EMAIL_WORKERS):
+    summary = profile_summary(analysis)
+    targets = [job for job in jobs if recipient(job)]
+    if not targets:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, write_email, job, summary): job for job in targets
+        }
+        for future in as_completed(futures):
+            try:
+                yield WrittenEmail(futures[future], future.result(), None)
+            except Exception as e:
+                yield WrittenEmail(futures[future], None, str(e))
+
+
+class SmtpSender:
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        user: str = SMTP_USER,
+        password: str = SMTP_PASSWORD,
+        sender: str = SMTP_SENDER,
+        starttls: bool = SMTP_STARTTLS,
+        per_minute: float = SMTP_RPM,
+        retries: int = 3,
+        base_delay: float = 2.0,
+        timeout: float = 30,
+    ):
+        if not host:
+            raise ValueError("servidor SMTP não configurado (OPENSCOUT_SMTP_HOST)")
+        if not (sender or user):
+            raise ValueError("remetente não configurado (OPENSCOUT_SMTP_SENDER)")
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender or user
+        self.starttls = starttls
+        self.retries = retries
+        self.base_delay = base_delay
+        self.timeout = timeout
+        self._limiter = RateLimiter(per_minute, burst=1)
+        self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                smtp.ehlo()
+                if self.starttls:
+                    smtp.starttls()
+                    smtp.ehlo()
+                if self.user:
+                    smtp.login(self.user, self.password)
+            except BaseException:
+                smtp.close()
+                raise
+            self._smtp = smtp
+        return self._smtp
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+    def message(self, email: JobApplicationEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email.recipient_email
+        message["Subject"] = email.subject
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = make_msgid()
+        message.set_content(email.body)
+        return message
+
+    def send(self, email: JobApplicationEmail) -> SendResult:
+        message = self.message(email)
+        error = None
+        for attempt in range(1, self.retries + 2):
+            self._limiter.wait()
+            try:
+                self._connect().send_message(message)
+                return SendResult(email, True, attempt, None)
+            except smtplib.SMTPAuthenticationError:
+                raise
+            except smtplib.SMTPRecipientsRefused as e:
+                error = "; ".join(f"{code} {reply!r}" for code, reply in e.recipients.values())
+                if all(code >= 500 for code, _ in e.recipients.values()):
+                    return SendResult(email, False, attempt, error)
+            except smtplib.SMTPResponseException as e:
+                error = f"{e.smtp_code} {e.smtp_error!r}"
+                if e.smtp_code >= 500:
+                    return SendResult(email, False, attempt, error)
+            except (smtplib.SMTPException, OSError) as e:
+                error = str(e) or type(e).__name__
+                self.close()
+
+            if attempt <= self.retries:
+                time.sleep(self.base_delay * 2 ** (attempt - 1) + random.uniform(0, self.base_delay))
+        return SendResult(email, False, self.retries + 1, error)
+
+    def send_all(self, emails):
+        for email in emails:
+            yield self.send(email)
+
+
+def send_emails(emails, **settings):
+    with SmtpSender(**settings) as sender:
+        yield from sender.send_all(emails)
+
+
+def _write_command(args):
+    with open(args.result, encoding="utf-8") as f:
+        result = json.load(f)
+    analysis = ResumeAnalysis.model_validate(result["analysis"])
+    jobs = [JobListing.model_validate(job) for job in result["jobs"]]
+
+    written = []
+    for item in write_emails(analysis, jobs, args.workers):
+        if item.email is None:
+            print(f"Erro em {item.job.company}: {item.error}", file=sys.stderr, flush=True)
+        else:
+            written.append(item.email.model_dump())
+            print(f"Email para {item.email.company} ({item.email.recipient_email})", flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(written, f, ensure_ascii=False, indent=2)
+
+
+def _send_command(args):
+    with open(args.emails, encoding="utf-8") as f:
+        emails = [JobApplicationEmail.model_validate(email) for email in json.load(f)]
+
+    failed = 0
+    for result in send_emails(emails, host=args.host, port=args.port, per_minute=args.per_minute):
+        status = "enviado" if result.ok else f"falhou: {result.error}"
+        failed += not result.ok
+        print(f"{result.email.recipient_email}: {status} ({result.attempts} tentativa(s))", flush=True)
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera e envia emails de candidatura.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write = commands.add_parser("write", help="gera emails a partir de um resultado JSON do batch")
+    write.add_argument("result")
+    write.add_argument("-o", "--output", default="emails.json")
+    write.add_argument("-w", "--workers", type=int, default=EMAIL_WORKERS)
+    write.set_defaults(handler=_write_command)
+
+    send = commands.add_parser("send", help="envia os emails de um arquivo JSON por uma única conexão SMTP")
+    send.add_argument("emails")
+    send.add_argument("--host", default=SMTP_HOST)
+    send.add_argument("--port", type=int, default=SMTP_PORT)
+    send.add_argument("--per-minute", type=float, default=SMTP_RPM)
+    send.set_defaults(handler=_send_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
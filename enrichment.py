@@ -0,0 +1,138 @@
+import asyncio
+import html
+import json
+import os
+import re
+from collections import defaultdict
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+import metrics
+from cache import DiskCache
+from models import JobListing
+
+ENRICH = os.getenv("OPENSCOUT_ENRICH", "1").lower() in ("1", "true", "yes")
+MAX_CONNECTIONS = int(os.getenv("OPENSCOUT_ENRICH_MAX_CONNECTIONS", 32))
+PER_HOST = int(os.getenv("OPENSCOUT_ENRICH_PER_HOST", 4))
+TIMEOUT = float(os.getenv("OPENSCOUT_ENRICH_TIMEOUT", 10))
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; OpenScout/1.0)"
+
+# The lookbehind skips URL credentials such as https://key@o1.ingest.sentry.io.
+EMAIL_PATTERN = re.compile(r"(?<![\w.%+/-])[a-z0-9][a-z0-9._%+-]*@(?:[a-z0-9-]+\.)+[a-z]{2,}", re.IGNORECASE)
+MAILTO_PATTERN = re.compile(r"""href\s*=\s*["']?mailto:([^"'?>\s]+)""", re.IGNORECASE)
+_NON_TEXT = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+_ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+
+page_cache = DiskCache(
+    "job_pages",
+    ttl=float(os.getenv("OPENSCOUT_ENRICH_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("OPENSCOUT_ENRICH_CACHE_MAX_ENTRIES", 50000)),
+)
+
+
+def _valid_email(email: str) -> bool:
+    return not email.endswith(_ASSET_SUFFIXES) and EMAIL_PATTERN.fullmatch(email) is not None
+
+
+def extract_emails(page: str) -> list[str]:
+    page = _NON_TEXT.sub(" ", page)
+    found = [unquote(address) for match in MAILTO_PATTERN.findall(page) for address in match.split(",")]
+    found += EMAIL_PATTERN.findall(html.unescape(page))
+
+    emails = {}
+    for email in found:
+        email = email.strip().lower()
+        if _valid_email(email):
+            emails.setdefault(email, None)
+    return list(emails)
+
+
+def merge_emails(job: JobListing, emails: list[str]) -> JobListing:
+    # `emails` come from a page that was fetched: whatever the model wrote and the page does not show is dropped.
+    if not emails:
+        return job.model_copy(update={"contact_email": "", "contact_emails": [], "contact_verified": False})
+    current = job.contact_email.strip().lower()
+    contact_email = current if current in emails else emails[0]
+    return job.model_copy(update={
+        "contact_email": contact_email,
+        "contact_emails": list(dict.fromkeys([contact_email, *emails])),
+        "contact_verified": True,
+    })
+
+
+class PageFetcher:
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        per_host: int = PER_HOST,
+        timeout: float = TIMEOUT,
+        cache: DiskCache = page_cache,
+    ):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = defaultdict(int)
+
+    async def emails(self, client: httpx.AsyncClient, host_slots: dict, url: str) -> list[str]:
+        cached = self.cache.get(url)
+        entry = json.loads(cached) if cached else None
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with host_slots[urlsplit(url).hostname]:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and entry is not None:
+                    self.stats["not_modified"] += 1
+                    return entry["emails"]
+                response.raise_for_status()
+                body = b""
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= MAX_PAGE_BYTES:
+                        break
+                page = body.decode(response.encoding or "utf-8", errors="replace")
+
+        self.stats["fetched"] += 1
+        emails = extract_emails(page)
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.set(url, json.dumps({"etag": etag, "last_modified": last_modified, "emails": emails}))
+        return emails
+
+    async def enrich(self, jobs: list[JobListing]) -> list[JobListing]:
+        urls = list(dict.fromkeys(job.url for job in jobs if job.url.startswith(("http://", "https://"))))
+        if not urls:
+            return jobs
+
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(
+            limits=limits, timeout=self.timeout, follow_redirects=True, headers={"User-Agent": USER_AGENT},
+        ) as client:
+            results = await asyncio.gather(
+                *(self.emails(client, host_slots, url) for url in urls), return_exceptions=True,
+            )
+
+        found = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+            else:
+                found[url] = result
+        return [merge_emails(job, found[job.url]) if job.url in found else job for job in jobs]
+
+
+def enrich_jobs(jobs: list[JobListing], fetcher: PageFetcher | None = None) -> list[JobListing]:
+    fetcher = fetcher or PageFetcher()
+    with metrics.span("enrich", jobs=len(jobs)) as span:
+        enriched = asyncio.run(fetcher.enrich(jobs))
+        span.attrs.update(fetcher.stats)
+        span.attrs["with_email"] = sum(1 for job in enriched if job.contact_verified)
+    return enriched
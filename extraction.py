@@ -0,0 +1,199 @@
+import io
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+import docx
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+TOKEN_BUDGET = int(os.getenv("OPENSCOUT_TOKEN_BUDGET", 3000))
+PARALLEL_MIN_PAGES = int(os.getenv("OPENSCOUT_PARALLEL_MIN_PAGES", 8))
+MAX_WORKERS = int(os.getenv("OPENSCOUT_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+PRIORITY_SECTIONS = (
+    "habilidades", "competências", "competencias", "skills", "tecnologias", "technologies",
+    "conhecimentos", "stack", "experiência", "experiencia", "experience", "histórico profissional",
+    "employment", "work history", "idiomas", "languages",
+)
+OTHER_SECTIONS = (
+    "resumo", "summary", "sobre", "about", "perfil", "profile", "objetivo", "objective",
+    "formação", "formacao", "education", "educação", "projetos", "projects", "certificações",
+    "certificacoes", "certifications", "cursos", "courses", "contato", "contact",
+)
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PAGE_NUMBER = re.compile(r"^(p[aá]gina|page|p[aá]g\.?)?\s*\d+\s*((de|of|/)\s*\d+)?$", re.IGNORECASE)
+_WORD = re.compile(r"\S+")
+
+
+class UnsupportedFileType(ValueError):
+    pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # One long-lived pool, started with spawn: forking the threaded Streamlit server
+    # could copy a lock held by another thread into the child.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _extract_pages(data: bytes, start: int, stop: int) -> list[str]:
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_pdf_pages(data: bytes) -> list[str]:
+    n_pages = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    workers = min(MAX_WORKERS, n_pages)
+    if n_pages < PARALLEL_MIN_PAGES or workers < 2:
+        return _extract_pages(data, 0, n_pages)
+
+    chunk = -(-n_pages // workers)
+    ranges = [(start, min(start + chunk, n_pages)) for start in range(0, n_pages, chunk)]
+    try:
+        futures = [_get_pool().submit(_extract_pages, data, start, stop) for start, stop in ranges]
+        return [page for future in futures for page in future.result()]
+    except BrokenProcessPool:
+        _reset_pool()
+        return _extract_pages(data, 0, n_pages)
+
+
+def extract_docx_pages(data: bytes) -> list[str]:
+    document = docx.Document(io.BytesIO(data))
+    return ["\n".join(paragraph.text for paragraph in document.paragraphs)]
+
+
+def strip_repeated_lines(pages: list[str]) -> list[str]:
+    if len(pages) < 3:
+        return pages
+
+    edges = Counter()
+    split_pages = []
+    for page in pages:
+        lines = [line.strip() for line in page.splitlines() if line.strip()]
+        split_pages.append(lines)
+        edges.update(set(lines[:2] + lines[-2:]))
+
+    threshold = len(pages) // 2 + 1
+    repeated = {
+        line for line, count in edges.items()
+        if count >= threshold and _heading_kind(line) is None
+    }
+
+    cleaned = []
+    for lines in split_pages:
+        head = lines[:2]
+        tail = lines[max(len(lines) - 2, len(head)):]
+        body = lines[len(head):len(lines) - len(tail)]
+        kept = [line for line in head if line not in repeated and not _PAGE_NUMBER.match(line)]
+        kept += body
+        kept += [line for line in tail if line not in repeated and not _PAGE_NUMBER.match(line)]
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def normalize_whitespace(text: str) -> str:
+    lines = [_SPACES.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(text) // 4, len(_WORD.findall(text)))
+
+
+def _heading_kind(line: str):
+    heading = line.strip().strip(":").lower()
+    if not heading or len(heading) > 40:
+        return None
+    if any(heading.startswith(name) for name in PRIORITY_SECTIONS):
+        return "priority"
+    if any(heading.startswith(name) for name in OTHER_SECTIONS):
+        return "other"
+    return None
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    sections = [["intro", []]]
+    for line in text.splitlines():
+        kind = _heading_kind(line)
+        if kind is not None:
+            sections.append([kind, []])
+        sections[-1][1].append(line)
+    return [(kind, "\n".join(lines)) for kind, lines in sections if lines]
+
+
+def _truncate(text: str, budget: int) -> str:
+    lines = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) or 1
+        if used + cost > budget:
+            remaining = budget - used
+            if remaining > 0:
+                lines.append(" ".join(line.split()[:remaining]))
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def fit_token_budget(text: str, budget: int = TOKEN_BUDGET) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+
+    sections = split_sections(text)
+    order = sorted(
+        range(len(sections)),
+        key=lambda i: ({"priority": 0, "intro": 1, "other": 2}[sections[i][0]], i),
+    )
+
+    kept = {}
+    remaining = budget
+    for i in order:
+        if remaining <= 0:
+            break
+        body = sections[i][1]
+        cost = estimate_tokens(body)
+        if cost > remaining:
+            body = _truncate(body, remaining)
+            cost = estimate_tokens(body)
+        if body:
+            kept[i] = body
+            remaining -= cost
+
+    return "\n\n".join(kept[i] for i in sorted(kept))
+
+
+def extract_resume_text(data: bytes, mime_type: str, token_budget: int = TOKEN_BUDGET) -> str:
+    if mime_type == PDF_MIME:
+        pages = extract_pdf_pages(data)
+    elif mime_type == DOCX_MIME:
+        pages = extract_docx_pages(data)
+    else:
+        raise UnsupportedFileType(mime_type)
+
+    text = normalize_whitespace("\n".join(strip_repeated_lines(pages)))
+    return fit_token_budget(text, token_budget)
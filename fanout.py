@@ -0,0 +1,73 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+from dedup import deduplicate
+from models import JobSearchResults
+
+PLATFORMS = {
+    "LinkedIn": "linkedin.com/jobs",
+    "Indeed": "indeed.com",
+    "Glassdoor": "glassdoor.com",
+    "Stack Overflow Jobs": "stackoverflow.com/jobs",
+    "GitHub Jobs": "github.com/jobs",
+    "Wellfound": "wellfound.com",
+    "Remote.co": "remote.co",
+    "We Work Remotely": "weworkremotely.com",
+}
+# Stack Overflow Jobs and GitHub Jobs were shut down; they stay in PLATFORMS
+# so they can still be requested explicitly.
+DEFAULT_PLATFORMS = ["LinkedIn", "Indeed", "Glassdoor", "Wellfound", "Remote.co", "We Work Remotely"]
+
+FANOUT_WORKERS = int(os.getenv("OPENSCOUT_FANOUT_WORKERS", 4))
+CLUSTER_SIZE = 3
+MAX_CLUSTERS = 2
+
+
+class SubSearch(NamedTuple):
+    platform: str
+    domain: str
+    skills: list[str]
+
+
+def skill_clusters(skills: list[str], cluster_size: int = CLUSTER_SIZE, max_clusters: int = MAX_CLUSTERS):
+    top = skills[:cluster_size * max_clusters]
+    clusters = [top[i:i + cluster_size] for i in range(0, len(top), cluster_size)]
+    return clusters or [[]]
+
+
+def plan_sub_searches(analysis, platforms: list[str] | None = None) -> list[SubSearch]:
+    platforms = platforms or DEFAULT_PLATFORMS
+    return [
+        SubSearch(platform, PLATFORMS[platform], cluster)
+        for cluster in skill_clusters(analysis.skills)
+        for platform in platforms
+    ]
+
+
+def merge_results(results: list[JobSearchResults]) -> JobSearchResults:
+    return JobSearchResults(jobs=deduplicate([job for result in results for job in result.jobs]))
+
+
+def run_fanout(sub_searches: list[SubSearch], run_one, max_workers: int = FANOUT_WORKERS, on_result=None):
+    results = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, run_one, sub_search): sub_search
+            for sub_search in sub_searches
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    if errors and not results:
+        raise errors[0]
+    return merge_results(results)
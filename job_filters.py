@@ -0,0 +1,42 @@
+import math
+
+from dedup import fingerprint
+
+RELEVANCE = "Relevância"
+
+SORT_KEYS = {
+    RELEVANCE: None,
+    "Ordem original": None,
+    "Título": lambda job: job.job_title.lower(),
+    "Empresa": lambda job: job.company.lower(),
+    "Nível": lambda job: job.required_experience_level.lower(),
+}
+
+
+def job_platforms(job) -> list[str]:
+    return job.platforms or [job.platform]
+
+
+def filter_jobs(jobs, platform=None, level=None):
+    if platform is not None:
+        jobs = [job for job in jobs if platform in job_platforms(job)]
+    if level is not None:
+        jobs = [job for job in jobs if job.required_experience_level == level]
+    return jobs
+
+
+def sort_jobs(jobs, sort_by: str, scores: dict[str, float] | None = None):
+    if sort_by == RELEVANCE and scores is not None:
+        return sorted(jobs, key=lambda job: -scores.get(fingerprint(job), 0.0))
+
+    key = SORT_KEYS[sort_by]
+    if key is None:
+        return list(jobs)
+    return sorted(jobs, key=key)
+
+
+def paginate(jobs, page: int, page_size: int):
+    n_pages = max(1, math.ceil(len(jobs) / page_size))
+    page = min(max(page, 1), n_pages)
+    start = (page - 1) * page_size
+    return jobs[start:start + page_size], n_pages
@@ -0,0 +1,131 @@
+import json
+import re
+from typing import NamedTuple
+
+from pydantic import ValidationError
+
+from models import JobListing
+
+FINAL_ANSWER = "Final Answer:"
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class SkippedJob(NamedTuple):
+    raw: str
+    error: str
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'vaga'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def _loads(raw: str):
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", raw))
+
+
+def validate_job(raw: str) -> JobListing:
+    data = _loads(raw)
+    if isinstance(data, dict):
+        # The prompt asks for an empty contact email when the result has none; models often omit the key.
+        data.setdefault("contact_email", "")
+    return JobListing.model_validate(data)
+
+
+class JobStreamParser:
+    """Emits each JobListing as soon as its object closes inside a JSON array.
+
+    The text may be a ReAct answer ("Thought: ... Final Answer: {...}"), bare JSON or
+    JSON after some prose, fed in arbitrary chunks. Entries that fail to parse or
+    validate are kept in `skipped` instead of failing the whole answer; `found_list`
+    tells an empty result (`{"jobs": []}`) from an answer without JSON.
+    """
+
+    def __init__(self, on_job=None):
+        self.on_job = on_job
+        self.jobs = []
+        self.skipped = []
+        self.reset()
+
+    def reset(self):
+        self._text = ""
+        self._pos = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._start = None
+        self._depth = 0
+        self.found_list = False
+
+    def _json_start(self) -> int | None:
+        marker = self._text.find(FINAL_ANSWER)
+        if marker >= 0:
+            return marker + len(FINAL_ANSWER)
+        # Prose before the JSON ("Aqui estão as vagas: {...}"): start at the first bracket.
+        starts = [i for i in (self._text.find("{"), self._text.find("[")) if i >= 0]
+        return min(starts) if starts else None
+
+    def feed(self, chunk: str) -> list[JobListing]:
+        self._text += chunk
+        if self._pos is None:
+            self._pos = self._json_start()
+            if self._pos is None:
+                return []
+
+        found = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "[{":
+                if c == "{" and self._start is None and self._stack and self._stack[-1] == "[":
+                    self._start, self._depth = i, len(self._stack)
+                self.found_list = self.found_list or c == "["
+                self._stack.append(c)
+            elif c in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if self._start is not None and len(self._stack) == self._depth:
+                    job = self._close(text[self._start:i + 1])
+                    self._start = None
+                    if job is not None:
+                        found.append(job)
+        self._pos = len(text)
+        return found
+
+    def _close(self, raw: str) -> JobListing | None:
+        try:
+            job = validate_job(raw)
+        except ValueError as e:
+            self.skipped.append(SkippedJob(raw, _describe(e)))
+            return None
+        self.jobs.append(job)
+        if self.on_job is not None:
+            self.on_job(job)
+        return job
+
+    def finish(self):
+        if self._start is not None:
+            self.skipped.append(SkippedJob(self._text[self._start:], "vaga incompleta no fim da resposta"))
+            self._start = None
+
+
+def parse_jobs(text: str) -> tuple[list[JobListing], list[SkippedJob]]:
+    parser = JobStreamParser()
+    parser.feed(text)
+    parser.finish()
+    if text.strip() and not parser.found_list:
+        raise ValueError(f"resposta da busca sem lista de vagas em JSON: {text.strip()[:200]!r}")
+    return parser.jobs, parser.skipped
@@ -0,0 +1,335 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import NamedTuple
+
+import metrics
+from cache import CACHE_DIR
+from models import JobApplicationEmail, JobListing, JobSearchResults, ResumeAnalysis
+
+QUEUE_PATH = os.getenv("OPENSCOUT_QUEUE_PATH", os.path.join(CACHE_DIR, "queue.sqlite3"))
+QUEUE_WORKERS = int(os.getenv("OPENSCOUT_QUEUE_WORKERS", 2))
+POLL_INTERVAL = float(os.getenv("OPENSCOUT_QUEUE_POLL_INTERVAL", 1.0))
+RETENTION = float(os.getenv("OPENSCOUT_QUEUE_RETENTION", 7 * 24 * 3600))
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 6 * HEARTBEAT_INTERVAL
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+SEARCH_OPTIONS = (
+    "use_cache", "analysis_mode", "fanout", "platforms", "local_first", "extraction_seconds", "write_emails",
+    "profile_id",
+)
+
+
+class SearchStatus(NamedTuple):
+    id: str
+    resume_key: str
+    state: str
+    position: int
+    analysis: ResumeAnalysis | None
+    jobs: list[JobListing]
+    error: str | None
+    diagnostics: dict | None
+    emails: list[JobApplicationEmail]
+
+
+class SearchQueue:
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                "id TEXT PRIMARY KEY, resume_key TEXT NOT NULL, state TEXT NOT NULL, "
+                "resume_text TEXT NOT NULL, options TEXT NOT NULL, "
+                "analysis TEXT, jobs TEXT NOT NULL DEFAULT '[]', error TEXT, diagnostics TEXT, worker TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, heartbeat_at REAL, finished_at REAL);"
+                "CREATE INDEX IF NOT EXISTS searches_state ON searches (state, created_at);"
+                "CREATE INDEX IF NOT EXISTS searches_resume ON searches (resume_key, created_at);"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(searches)")}
+            if "emails" not in columns:
+                self._conn.execute("ALTER TABLE searches ADD COLUMN emails TEXT NOT NULL DEFAULT '[]'")
+        return self._conn
+
+    def submit(self, resume_text: str, resume_key: str = "", **options) -> str:
+        unknown = set(options) - set(SEARCH_OPTIONS)
+        if unknown:
+            raise ValueError(f"unknown search options: {sorted(unknown)}")
+
+        search_id = uuid.uuid4().hex
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO searches (id, resume_key, state, resume_text, options, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (search_id, resume_key, QUEUED, resume_text, json.dumps(options), time.time()),
+            )
+        return search_id
+
+    def status(self, search_id: str) -> SearchStatus | None:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT resume_key, state, analysis, jobs, error, diagnostics, emails, created_at "
+                "FROM searches WHERE id = ?",
+                (search_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            resume_key, state, analysis, jobs, error, diagnostics, emails, created_at = row
+            position = 0
+            if state == QUEUED:
+                position = conn.execute(
+                    "SELECT COUNT(*) FROM searches WHERE state = ? AND created_at <= ?", (QUEUED, created_at),
+                ).fetchone()[0]
+
+        return SearchStatus(
+            id=search_id,
+            resume_key=resume_key,
+            state=state,
+            position=position,
+            analysis=ResumeAnalysis.model_validate_json(analysis) if analysis else None,
+            jobs=[JobListing.model_validate(job) for job in json.loads(jobs)],
+            error=error,
+            diagnostics=json.loads(diagnostics) if diagnostics else None,
+            emails=[JobApplicationEmail.model_validate(email) for email in json.loads(emails)],
+        )
+
+    def result(self, search_id: str):
+        status = self.status(search_id)
+        if status is None or status.state != DONE:
+            return None
+        return status.analysis, JobSearchResults(jobs=status.jobs)
+
+    def latest(self, resume_key: str) -> str | None:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id FROM searches WHERE resume_key = ? AND state != ? ORDER BY created_at DESC LIMIT 1",
+                (resume_key, FAILED),
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, worker: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, resume_text, options, created_at FROM searches "
+                    "WHERE state = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE searches SET state = ?, worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (RUNNING, worker, now, now, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        search_id, resume_text, options, created_at = row
+        return search_id, resume_text, json.loads(options), now - created_at
+
+    def _update(self, sql: str, params: tuple):
+        with self._lock:
+            self._connect().execute(sql, params)
+
+    def heartbeat(self, search_id: str):
+        self._update("UPDATE searches SET heartbeat_at = ? WHERE id = ?", (time.time(), search_id))
+
+    def set_analysis(self, search_id: str, analysis: ResumeAnalysis):
+        self._update("UPDATE searches SET analysis = ? WHERE id = ?", (analysis.model_dump_json(), search_id))
+
+    def add_job(self, search_id: str, job: JobListing):
+        self._update(
+            "UPDATE searches SET jobs = json_insert(jobs, '$[#]', json(?)) WHERE id = ?",
+            (job.model_dump_json(), search_id),
+        )
+
+    def add_email(self, search_id: str, email: JobApplicationEmail):
+        self._update(
+            "UPDATE searches SET emails = json_insert(emails, '$[#]', json(?)) WHERE id = ?",
+            (email.model_dump_json(), search_id),
+        )
+
+    def finish(self, search_id: str, analysis: ResumeAnalysis, jobs: list[JobListing], diagnostics: dict):
+        self._update(
+            "UPDATE searches SET state = ?, analysis = ?, jobs = ?, diagnostics = ?, finished_at = ? WHERE id = ?",
+            (
+                DONE,
+                analysis.model_dump_json(),
+                json.dumps([job.model_dump() for job in jobs], ensure_ascii=False),
+                json.dumps(diagnostics, ensure_ascii=False),
+                time.time(),
+                search_id,
+            ),
+        )
+
+    def fail(self, search_id: str, error: str, diagnostics: dict | None = None):
+        self._update(
+            "UPDATE searches SET state = ?, error = ?, diagnostics = ?, finished_at = ? WHERE id = ?",
+            (
+                FAILED,
+                error,
+                json.dumps(diagnostics, ensure_ascii=False) if diagnostics else None,
+                time.time(),
+                search_id,
+            ),
+        )
+
+    def requeue_stale(self, max_age: float = STALE_AFTER) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "UPDATE searches SET state = ?, worker = NULL, jobs = '[]', emails = '[]' WHERE state = ? AND heartbeat_at < ?",
+                (QUEUED, RUNNING, time.time() - max_age),
+            ).rowcount
+
+    def purge(self, max_age: float = RETENTION) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "DELETE FROM searches WHERE state IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - max_age),
+            ).rowcount
+
+
+def _process(queue: SearchQueue, search_id: str, resume_text: str, options: dict, waited: float, traces=None):
+    from agents import ANALYSIS_READY, DONE as SEARCH_DONE, JOB_FOUND, search_jobs_stream
+
+    trace = metrics.Trace()
+    extraction_seconds = options.pop("extraction_seconds", None)
+    if extraction_seconds is not None:
+        trace.record("extraction", extraction_seconds)
+    trace.record("queue_wait", waited)
+    with_emails = options.pop("write_emails", False)
+    profile_id = options.pop("profile_id", None)
+    token = metrics.current_trace.set(trace)
+
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            queue.heartbeat(search_id)
+
+    threading.Thread(target=beat, daemon=True).start()
+    try:
+        if profile_id is not None:
+            analysis, jobs = _refresh_profile(queue, search_id, profile_id, trace)
+            if with_emails:
+                _write_emails(queue, search_id, analysis, jobs)
+            queue.finish(search_id, analysis, jobs, trace.as_dict())
+            return
+        for event in search_jobs_stream(resume_text, trace=trace, **options):
+            if event.kind == ANALYSIS_READY:
+                queue.set_analysis(search_id, event.data)
+            elif event.kind == JOB_FOUND:
+                queue.add_job(search_id, event.data)
+            elif event.kind == SEARCH_DONE:
+                analysis, results = event.data
+                if with_emails:
+                    _write_emails(queue, search_id, analysis, results.jobs)
+                queue.finish(search_id, analysis, results.jobs, trace.as_dict())
+    except Exception as e:
+        queue.fail(search_id, str(e), trace.as_dict())
+    finally:
+        stopped.set()
+        metrics.current_trace.reset(token)
+        if traces is not None:
+            traces.put(trace.as_dict())
+
+
+def _refresh_profile(queue: SearchQueue, search_id: str, profile_id: str, trace: metrics.Trace):
+    from profiles import ProfileStore, refresh
+
+    store = ProfileStore()
+    profile = store.get(profile_id)
+    if profile is None:
+        raise ValueError("perfil não encontrado")
+    queue.set_analysis(search_id, profile.analysis)
+    return profile.analysis, refresh(store, profile, trace=trace)
+
+
+def _write_emails(queue: SearchQueue, search_id: str, analysis: ResumeAnalysis, jobs: list[JobListing]):
+    from emails import write_emails
+
+    for item in write_emails(analysis, jobs):
+        if item.email is not None:
+            queue.add_email(search_id, item.email)
+
+
+def run_worker(path: str = QUEUE_PATH, poll_interval: float = POLL_INTERVAL, traces=None):
+    import agents
+
+    agents.warm_up()
+    queue = SearchQueue(path)
+    queue.purge()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            queue.requeue_stale()
+            time.sleep(poll_interval)
+            continue
+        _process(queue, *claimed, traces=traces)
+
+
+def _collect_traces(traces):
+    while True:
+        metrics.observe_trace(traces.get())
+
+
+def start_workers(n_workers: int = QUEUE_WORKERS, path: str = QUEUE_PATH) -> list:
+    # spawn: the caller (e.g. the Streamlit server) already runs threads, which fork would not carry over safely.
+    context = multiprocessing.get_context("spawn")
+    traces = context.Queue()
+    threading.Thread(target=_collect_traces, args=(traces,), daemon=True).start()
+
+    workers = []
+    for i in range(n_workers):
+        process = context.Process(
+            target=run_worker, args=(path, POLL_INTERVAL, traces), name=f"openscout-worker-{i}", daemon=True,
+        )
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa as buscas enfileiradas pela interface.")
+    parser.add_argument("-w", "--workers", type=int, default=max(QUEUE_WORKERS, 1))
+    parser.add_argument("--queue", default=QUEUE_PATH, help="arquivo SQLite da fila")
+    args = parser.parse_args()
+
+    metrics.start_metrics_server()
+    workers = start_workers(args.workers, args.queue)
+    print(f"{len(workers)} workers processando {args.queue}", flush=True)
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
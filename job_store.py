@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import threading
+import time
+
+from cache import CACHE_DIR
+from dedup import fingerprint, merge_jobs
+from models import JobListing
+from ranking import rank_jobs
+
+STORE_PATH = os.getenv("OPENSCOUT_JOB_STORE", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+FRESHNESS = float(os.getenv("OPENSCOUT_JOB_FRESHNESS", 3 * 24 * 3600))
+MIN_LOCAL_RESULTS = int(os.getenv("OPENSCOUT_MIN_LOCAL_RESULTS", 5))
+CANDIDATE_POOL = 10
+_LOOKUP_CHUNK = 500
+# jobs_fts rows share jobs.id; an explicit INTEGER PRIMARY KEY keeps it stable across VACUUM.
+_JOBS_TABLE = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    "id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL UNIQUE, data TEXT NOT NULL, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL)"
+)
+
+
+def _fts_query(terms: list[str]) -> str:
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms if term.strip()]
+    return " OR ".join(quoted)
+
+
+def _fts_row(job: JobListing) -> tuple[str, str, str]:
+    return job.job_title, job.company, " ; ".join(job.key_requirements)
+
+
+class JobStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            job_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if job_columns and "id" not in job_columns:
+                # Older stores had no id column; the index is rebuilt below from the new ids.
+                self._conn.executescript(
+                    "BEGIN; ALTER TABLE jobs RENAME TO jobs_old; DROP INDEX IF EXISTS jobs_last_seen; "
+                    f"DROP TABLE IF EXISTS jobs_fts; {_JOBS_TABLE}; "
+                    "INSERT INTO jobs (fingerprint, data, first_seen, last_seen) "
+                    "SELECT fingerprint, data, first_seen, last_seen FROM jobs_old ORDER BY rowid; "
+                    "DROP TABLE jobs_old; COMMIT;"
+                )
+            self._conn.executescript(
+                f"{_JOBS_TABLE}; CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs (last_seen);"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs_fts)")}
+            if "fingerprint" in columns:
+                # Older stores keyed the index on an UNINDEXED column, which made every delete a full scan.
+                self._conn.execute("DROP TABLE jobs_fts")
+                columns = set()
+            # FTS rowid = jobs.id, so updates delete and insert by primary key.
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+                "job_title, company, key_requirements, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            if not columns:
+                rows = self._conn.execute("SELECT id, data FROM jobs").fetchall()
+                self._conn.executemany(
+                    "INSERT INTO jobs_fts (rowid, job_title, company, key_requirements) VALUES (?, ?, ?, ?)",
+                    [(job_id, *_fts_row(JobListing.model_validate_json(data))) for job_id, data in rows],
+                )
+            self._conn.commit()
+        return self._conn
+
+    def add(self, jobs: list[JobListing], seen_at: float | None = None):
+        seen_at = seen_at or time.time()
+        merged = {}
+        for job in jobs:
+            key = fingerprint(job)
+            merged[key] = merge_jobs([merged[key], job]) if key in merged else job
+
+        with self._lock:
+            conn = self._connect()
+            keys = list(merged)
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT fingerprint, data FROM jobs WHERE fingerprint IN ({', '.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                for key, data in rows:
+                    merged[key] = merge_jobs([JobListing.model_validate_json(data), merged[key]])
+
+            for key, job in merged.items():
+                job_id = conn.execute(
+                    "INSERT INTO jobs (fingerprint, data, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (fingerprint) DO UPDATE SET data = excluded.data, last_seen = excluded.last_seen "
+                    "RETURNING id",
+                    (key, job.model_dump_json(), seen_at, seen_at),
+                ).fetchone()[0]
+                conn.execute("DELETE FROM jobs_fts WHERE rowid = ?", (job_id,))
+                conn.execute(
+                    "INSERT INTO jobs_fts (rowid, job_title, company, key_requirements) VALUES (?, ?, ?, ?)",
+                    (job_id, *_fts_row(job)),
+                )
+            conn.commit()
+
+    def search(self, analysis, limit: int = MIN_LOCAL_RESULTS, max_age: float = FRESHNESS) -> list[JobListing]:
+        query = _fts_query(analysis.skills)
+        if not query:
+            return []
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT jobs.data FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid "
+                "WHERE jobs_fts MATCH ? AND jobs.last_seen >= ? "
+                "ORDER BY bm25(jobs_fts) LIMIT ?",
+                (query, time.time() - max_age, limit * CANDIDATE_POOL),
+            ).fetchall()
+
+        candidates = [JobListing.model_validate_json(data) for data, in rows]
+        return [job for job, _ in rank_jobs(analysis, candidates)[:limit]]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
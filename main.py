@@ -1,8 +1,274 @@
+import time
+
 import streamlit as st
-import PyPDF2
-import docx
 
-from agents import search_jobs
+import job_queue
+import metrics
+from cache import content_key, normalize_text
+from dedup import fingerprint
+from emails import SMTP_HOST, send_emails
+from extraction import extract_resume_text, UnsupportedFileType
+from job_filters import SORT_KEYS, filter_jobs, job_platforms, sort_jobs, paginate
+from profiles import ProfileStore, is_queue_key, queue_key
+from ranking import score_jobs
+
+
+def render_analysis(analysis):
+    st.success("✅ Análise concluída!")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Nível de Experiência")
+        exp_lvl_text = f"`{analysis.experience_level}`"
+        st.markdown(exp_lvl_text)
+
+        st.subheader("Idiomas")
+        langs_text = ", ".join([f"`{lang}`" for lang in analysis.languages])
+        st.markdown(langs_text)
+
+    with col2:
+        st.subheader("Habilidades Técnicas")
+        skills_text = ", ".join([f"`{skill}`" for skill in analysis.skills])
+        st.markdown(skills_text)
+
+
+def render_job(i, job, score=None):
+    with st.container():
+        col1, col2 = st.columns([3, 1])
+
+        with col1:
+            st.markdown(f"### {i}. {job.job_title}")
+            st.write(f"**🏢 Empresa:** {job.company}")
+            st.write(f"**📍 Localização:** {job.location}")
+
+        with col2:
+            if score is not None:
+                st.metric("🎯 Relevância", f"{score:.0%}")
+            st.write(f"**Plataforma:** {', '.join(job_platforms(job))}")
+            exp_lvl_text = f"`{job.required_experience_level}`"
+            st.markdown(exp_lvl_text)
+
+        st.write("**📋 Requisitos:**")
+        reqs_text = ", ".join([f"`{req}`" for req in job.key_requirements])
+        st.markdown(reqs_text)
+
+        emails = job.contact_emails or [job.contact_email]
+        if any(emails):
+            label = "Contato" if job.contact_verified else "Contato (não confirmado no anúncio)"
+            st.write(f"**✉️ {label}:** {', '.join(e for e in emails if e)}")
+
+        st.divider()
+
+
+def render_jobs(jobs, analysis):
+    if not jobs:
+        st.warning("Nenhuma vaga encontrada. Tente novamente mais tarde.")
+        return
+
+    st.success(f"✅ {len(jobs)} vagas encontradas!")
+
+    st.subheader("Filtros")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        platforms = sorted(set([p for job in jobs for p in job_platforms(job)]))
+        selected_platform = st.selectbox("Plataforma", ["Todas"] + platforms)
+
+    with col2:
+        levels = sorted(set([job.required_experience_level for job in jobs]))
+        selected_level = st.selectbox("Nível", ["Todos"] + levels)
+
+    with col3:
+        sort_by = st.selectbox("Ordenar por", list(SORT_KEYS))
+
+    with col4:
+        page_size = st.selectbox("Vagas por página", [10, 20, 50])
+
+    filtered_jobs = filter_jobs(
+        jobs,
+        platform=None if selected_platform == "Todas" else selected_platform,
+        level=None if selected_level == "Todos" else selected_level,
+    )
+    scores = {fingerprint(job): score for job, score in zip(jobs, score_jobs(analysis, jobs))}
+    filtered_jobs = sort_jobs(filtered_jobs, sort_by, scores)
+
+    n_pages = paginate(filtered_jobs, 1, page_size)[1]
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(
+            "Página", min_value=1, max_value=n_pages, value=1, step=1,
+            key=f"page-{selected_platform}-{selected_level}-{page_size}",
+        )
+    page_jobs, _ = paginate(filtered_jobs, page, page_size)
+
+    st.divider()
+
+    offset = (page - 1) * page_size
+    for i, job in enumerate(page_jobs, offset + 1):
+        render_job(i, job, scores[fingerprint(job)])
+
+
+def render_diagnostics(diagnostics):
+    with st.expander("🩺 Diagnóstico"):
+        totals = diagnostics["totals"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Tempo total", f"{totals.get('seconds', 0):.1f}s")
+        col2.metric("Tokens (prompt)", int(totals.get("prompt_tokens", 0)))
+        col3.metric("Tokens (resposta)", int(totals.get("completion_tokens", 0)))
+        col4.metric("Chamadas de ferramenta", int(totals.get("tool_calls", 0)))
+        st.dataframe(diagnostics["spans"], use_container_width=True)
+
+
+def email_key(email) -> tuple:
+    # One recruiting address can serve several postings at the same company.
+    return email.recipient_email, email.job_title, email.company
+
+
+def render_emails(search_id, emails):
+    st.success(f"✅ {len(emails)} emails de candidatura gerados!")
+
+    sent = st.session_state.setdefault("sent_emails", {}).setdefault(search_id, {})
+    for email in emails:
+        status = sent.get(email_key(email))
+        label = f"{email.company} — {email.subject}"
+        if status is not None:
+            label = f"{'✅' if status.ok else '❌'} {label}"
+        with st.expander(label):
+            st.write(f"**Para:** {email.recipient_email}")
+            st.write(f"**Assunto:** {email.subject}")
+            st.text(email.body)
+            if status is not None and not status.ok:
+                st.error(f"Falha no envio: {status.error}")
+
+    if not SMTP_HOST:
+        st.caption("Configure OPENSCOUT_SMTP_HOST para enviar os emails por aqui.")
+        return
+
+    pending = [email for email in emails if not getattr(sent.get(email_key(email)), "ok", False)]
+    if pending and st.button(f"📤 Enviar {len(pending)} emails", key=f"send-{search_id}"):
+        progress = st.progress(0.0, text="Enviando emails...")
+        try:
+            for n, result in enumerate(send_emails(pending), 1):
+                sent[email_key(result.email)] = result
+                progress.progress(n / len(pending), text=f"Enviando emails... {n}/{len(pending)}")
+        except Exception as e:
+            st.error(f"Erro no servidor SMTP: {str(e)}")
+        else:
+            st.rerun()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_resume_text(data: bytes, mime_type: str) -> tuple[str, float]:
+    # Streamlit reruns the script on every widget interaction; the text only depends on the file bytes.
+    # The time of the real extraction is cached with it, since the search is submitted on a later rerun.
+    started = time.perf_counter()
+    resume_text = extract_resume_text(data, mime_type)
+    return resume_text, time.perf_counter() - started
+
+
+@st.cache_resource(show_spinner=False)
+def start_search_workers():
+    # Searches run in worker processes (crewai is only imported there). With
+    # OPENSCOUT_QUEUE_WORKERS=0 they are started separately with `python job_queue.py`.
+    return job_queue.start_workers()
+
+
+def render_results(search_id, analysis, jobs, emails):
+    tabs = st.tabs(["📊 Análise do Currículo", "💼 Vagas Encontradas"] + (["✉️ Emails"] if emails else []))
+
+    with tabs[0]:
+        render_analysis(analysis)
+
+    with tabs[1]:
+        render_jobs(jobs, analysis)
+
+    if emails:
+        with tabs[2]:
+            render_emails(search_id, emails)
+
+
+@st.fragment(run_every=job_queue.POLL_INTERVAL)
+def poll_search(search_id):
+    status = search_queue.status(search_id)
+    if status is None or status.state in job_queue.FINISHED:
+        st.rerun()
+
+    if status.state == job_queue.QUEUED:
+        st.info(f"⏳ Busca na fila (posição {status.position}). Você pode fechar a página e voltar depois.")
+        return
+
+    tabs = st.tabs(["📊 Análise do Currículo", "💼 Vagas Encontradas"] + (["✉️ Emails"] if status.emails else []))
+
+    with tabs[0]:
+        if status.analysis is None:
+            st.info("⏳ Analisando seu currículo...")
+        else:
+            render_analysis(status.analysis)
+
+    with tabs[1]:
+        if not status.jobs:
+            st.info("⏳ Buscando vagas...")
+        for i, job in enumerate(status.jobs, 1):
+            render_job(i, job)
+
+    if status.emails:
+        with tabs[2]:
+            st.info(f"⏳ Escrevendo emails de candidatura... {len(status.emails)} prontos")
+            for email in status.emails:
+                with st.expander(f"{email.company} — {email.subject}"):
+                    st.text(email.body)
+
+
+def render_save_profile(status):
+    with st.expander("💾 Salvar perfil"):
+        st.write("Salve a análise para buscar depois só as vagas novas, sem enviar o currículo de novo.")
+        name = st.text_input("Nome do perfil", key=f"profile-name-{status.id}")
+        if st.button("Salvar", key=f"save-profile-{status.id}", disabled=not name.strip()):
+            profile_store.save(name.strip(), status.analysis, status.jobs)
+            st.success(f"✅ Perfil \"{name.strip()}\" salvo! Use a barra lateral para buscar vagas novas.")
+
+
+def render_profiles():
+    profiles = profile_store.all()
+    if not profiles:
+        return
+
+    with st.sidebar:
+        st.subheader("📁 Perfis salvos")
+        for profile in profiles:
+            clicked = st.button(
+                f"🔄 {profile.name}", key=f"refresh-{profile.id}", use_container_width=True,
+                help="Busca só as vagas que apareceram desde a última atualização",
+            )
+            if clicked:
+                st.query_params["search"] = search_queue.submit("", queue_key(profile.id), profile_id=profile.id)
+
+
+def show_search(search_id):
+    status = search_queue.status(search_id)
+    if status is None:
+        st.warning("⚠️ Busca não encontrada. Envie o currículo novamente.")
+        del st.query_params["search"]
+    elif status.state == job_queue.FAILED:
+        st.error(f"Erro ao processar: {status.error}")
+        if status.jobs and status.analysis is not None:
+            st.warning(f"⚠️ {len(status.jobs)} vagas foram encontradas antes do erro.")
+            render_results(search_id, status.analysis, status.jobs, status.emails)
+    elif status.state == job_queue.DONE:
+        if is_queue_key(status.resume_key):
+            st.info(f"🆕 {len(status.jobs)} vagas novas desde a última atualização do perfil.")
+        render_results(search_id, status.analysis, status.jobs, status.emails)
+        if not is_queue_key(status.resume_key):
+            render_save_profile(status)
+        if status.diagnostics:
+            render_diagnostics(status.diagnostics)
+    else:
+        poll_search(search_id)
+
+
+search_queue = job_queue.SearchQueue()
+profile_store = ProfileStore()
 
 st.set_page_config(
     page_title="OpenScout",
@@ -10,6 +276,10 @@ st.set_page_config(
     layout="wide"
 )
 
+metrics.start_metrics_server()
+if job_queue.QUEUE_WORKERS:
+    start_search_workers()
+
 st.title("🔍 OpenScout")
 st.subheader("Encontre vagas de tecnologia personalizadas para seu perfil")
 st.write("Envie seu currículo e encontraremos as melhores oportunidades tech para você.")
@@ -21,112 +291,53 @@ with st.expander("📖 Como funciona?"):
     4. **Receba vagas** que combinam com seu perfil
     """)
 
+
 uploaded_file = st.file_uploader(
     "📄 Envie seu currículo",
     type=["pdf", "docx"],
     help="Formatos aceitos: PDF ou DOCX"
 )
 
+render_profiles()
+search_id = st.query_params.get("search")
+
 if uploaded_file is not None:
     resume_text = ""
+    extraction_seconds = 0.0
 
     try:
-        if uploaded_file.type == "application/pdf":
-            reader = PyPDF2.PdfReader(uploaded_file)
-            for page in reader.pages:
-                resume_text += page.extract_text()
-        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            doc = docx.Document(uploaded_file)
-            for paragraph in doc.paragraphs:
-                resume_text += paragraph.text + "\n"
-        else:
-            st.error("Formato de arquivo não suportado.")
-            resume_text = ""
+        resume_text, extraction_seconds = cached_resume_text(uploaded_file.getvalue(), uploaded_file.type)
+    except UnsupportedFileType:
+        st.error("Formato de arquivo não suportado.")
     except Exception as e:
         st.error(f"Erro ao processar arquivo: {str(e)}")
-        resume_text = ""
 
     if resume_text:
-        if st.button("🚀 Buscar Vagas", type="primary", use_container_width=True):
-            with st.spinner("Analisando seu currículo e buscando vagas..."):
-                try:
-                    result = search_jobs(resume_text)
-
-                    tab1, tab2 = st.tabs(["📊 Análise do Currículo", "💼 Vagas Encontradas"])
-
-                    with tab1:
-                        st.success("✅ Análise concluída!")
-
-                        col1, col2 = st.columns(2)
-
-                        with col1:
-                            st.subheader("Nível de Experiência")
-                            exp_lvl_text = f"`{result.tasks_output[0].pydantic.experience_level}`"
-                            st.markdown(exp_lvl_text)
-
-                            st.subheader("Idiomas")
-                            langs_text = ", ".join([f"`{lang}`" for lang in result.tasks_output[0].pydantic.languages])
-                            st.markdown(langs_text)
-
-                        with col2:
-                            st.subheader("Habilidades Técnicas")
-                            skills_text = ", ".join([f"`{skill}`" for skill in result.tasks_output[0].pydantic.skills])
-                            st.markdown(skills_text)
-
-                    with tab2:
-                        jobs = result.tasks_output[1].pydantic.jobs
-
-                        if jobs:
-                            st.success(f"✅ {len(jobs)} vagas encontradas!")
-
-                            st.subheader("Filtros")
-                            col1, col2 = st.columns(2)
+        resume_key = content_key(normalize_text(resume_text))
+        current = search_queue.status(search_id) if search_id else None
+        if current is None or current.resume_key != resume_key and not is_queue_key(current.resume_key):
+            # Last search for this resume, possibly from an earlier session.
+            search_id = search_queue.latest(resume_key)
+            if search_id:
+                st.query_params["search"] = search_id
+            elif "search" in st.query_params:
+                del st.query_params["search"]
 
-                            with col1:
-                                platforms = list(set([job.platform for job in jobs]))
-                                selected_platform = st.selectbox("Plataforma", ["Todas"] + platforms)
-
-                            with col2:
-                                levels = list(set([job.required_experience_level for job in jobs]))
-                                selected_level = st.selectbox("Nível", ["Todos"] + levels)
-
-                            filtered_jobs = jobs
-                            if selected_platform != "Todas":
-                                filtered_jobs = [j for j in filtered_jobs if j.platform == selected_platform]
-                            if selected_level != "Todos":
-                                filtered_jobs = [j for j in filtered_jobs if j.required_experience_level == selected_level]
-
-                            st.divider()
-
-                            for i, job in enumerate(filtered_jobs, 1):
-                                with st.container():
-                                    col1, col2 = st.columns([3, 1])
-
-                                    with col1:
-                                        st.markdown(f"### {i}. {job.job_title}")
-                                        st.write(f"**🏢 Empresa:** {job.company}")
-                                        st.write(f"**📍 Localização:** {job.location}")
-
-                                    with col2:
-                                        st.write(f"**Plataforma:** {job.platform}")
-                                        exp_lvl_text = f"`{job.required_experience_level}`"
-                                        st.markdown(exp_lvl_text)
-
-                                    st.write("**📋 Requisitos:**")
-                                    reqs_text = ", ".join([f"`{req}`" for req in job.key_requirements])
-                                    st.markdown(reqs_text)
-
-                                    if job.contact_email:
-                                        st.write(f"**✉️ Contato:** {job.contact_email}")
-
-                                    st.divider()
-                        else:
-                            st.warning("Nenhuma vaga encontrada. Tente novamente mais tarde.")
+        write_emails = st.checkbox("✉️ Gerar emails de candidatura para as vagas com contato")
+        if search_id is None:
+            clicked = st.button("🚀 Buscar Vagas", type="primary", use_container_width=True)
+        else:
+            clicked = st.button("🔄 Atualizar busca", use_container_width=True)
 
-                except Exception as e:
-                    st.error(f"Erro ao processar: {str(e)}")
+        if clicked:
+            search_id = search_queue.submit(
+                resume_text, resume_key, extraction_seconds=extraction_seconds, write_emails=write_emails,
+            )
+            st.query_params["search"] = search_id
     else:
         st.warning("⚠️ Não foi possível extrair texto do arquivo. Verifique se o arquivo está correto.")
-else:
+elif search_id is None:
     st.info("👆 Comece enviando seu currículo no formato PDF, TXT ou DOCX.")
 
+if search_id:
+    show_search(search_id)
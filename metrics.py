@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cache import CACHE_DIR
+
+METRICS_PATH = os.getenv("OPENSCOUT_METRICS_PATH", os.path.join(CACHE_DIR, "metrics.jsonl"))
+METRICS_PORT = int(os.getenv("OPENSCOUT_METRICS_PORT", 0))
+
+current_trace = ContextVar("current_trace", default=None)
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.attrs = attrs
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "started_at": self.started_at, "seconds": round(self.seconds, 6), **self.attrs}
+
+
+class Trace:
+    def __init__(self, name: str = "search"):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, **attrs) -> Span:
+        span = Span(name, **attrs)
+        span.started_at -= seconds
+        span.seconds = seconds
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        span = Span(name, **attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            with self._lock:
+                self.spans.append(span)
+
+    def summary(self) -> list[dict]:
+        with self._lock:
+            return [span.as_dict() for span in sorted(self.spans, key=lambda s: s.started_at)]
+
+    def totals(self) -> dict:
+        totals = defaultdict(float)
+        with self._lock:
+            for span in self.spans:
+                for key in ("prompt_tokens", "completion_tokens", "retries"):
+                    totals[key] += span.attrs.get(key, 0)
+                if span.name.startswith("tool:"):
+                    totals["tool_calls"] += 1
+        totals["seconds"] = time.time() - self.started_at
+        return dict(totals)
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "totals": self.totals(),
+            "spans": self.summary(),
+        }
+
+
+@contextmanager
+def span(name: str, **attrs):
+    trace = current_trace.get()
+    if trace is None:
+        yield Span(name, **attrs)
+        return
+
+    parent = _current_span.get()
+    if parent is not None and name.startswith("tool:"):
+        parent.attrs["tool_calls"] = parent.attrs.get("tool_calls", 0) + 1
+
+    with trace.span(name, **attrs) as active:
+        token = _current_span.set(active)
+        try:
+            yield active
+        finally:
+            _current_span.reset(token)
+
+
+def add_retries(count: int = 1):
+    # Counted on the innermost open span (crew:*, tool:*, email:write), then summed by Trace.totals.
+    active = _current_span.get()
+    if active is not None and count:
+        active.attrs["retries"] = active.attrs.get("retries", 0) + count
+
+
+def record(name: str, seconds: float, **attrs):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.record(name, seconds, **attrs)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = defaultdict(float)
+        self.stage_count = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.retries = defaultdict(int)
+
+    def observe(self, span: Span):
+        with self._lock:
+            self.stage_seconds[span.name] += span.seconds
+            self.stage_count[span.name] += 1
+            for kind in ("prompt", "completion"):
+                self.tokens[(span.name, kind)] += span.attrs.get(f"{kind}_tokens", 0)
+            if "error" in span.attrs:
+                self.errors[span.name] += 1
+            if span.attrs.get("retries"):
+                self.retries[span.name] += span.attrs["retries"]
+
+    def count_retry(self, stage: str):
+        with self._lock:
+            self.retries[stage] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP openscout_stage_seconds Wall time spent per stage.",
+                "# TYPE openscout_stage_seconds summary",
+            ]
+            for stage in sorted(self.stage_count):
+                lines.append(f'openscout_stage_seconds_sum{{stage="{stage}"}} {self.stage_seconds[stage]:.6f}')
+                lines.append(f'openscout_stage_seconds_count{{stage="{stage}"}} {self.stage_count[stage]}')
+
+            lines += ["# HELP openscout_tokens_total LLM tokens per stage.", "# TYPE openscout_tokens_total counter"]
+            for (stage, kind), value in sorted(self.tokens.items()):
+                if value:
+                    lines.append(f'openscout_tokens_total{{stage="{stage}",kind="{kind}"}} {value}')
+
+            lines += ["# HELP openscout_errors_total Failed stages.", "# TYPE openscout_errors_total counter"]
+            for stage, value in sorted(self.errors.items()):
+                lines.append(f'openscout_errors_total{{stage="{stage}"}} {value}')
+
+            lines += ["# HELP openscout_retries_total Retried stages.", "# TYPE openscout_retries_total counter"]
+            for stage, value in sorted(self.retries.items()):
+                lines.append(f'openscout_retries_total{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+_export_lock = threading.Lock()
+
+
+def export(trace: Trace, path: str = METRICS_PATH):
+    for item in trace.spans:
+        registry.observe(item)
+    if not path:
+        return
+    with _export_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.as_dict(), ensure_ascii=False) + "\n")
+
+
+def observe_trace(data: dict):
+    for item in data["spans"]:
+        attrs = {key: value for key, value in item.items() if key not in ("name", "started_at", "seconds")}
+        span = Span(item["name"], **attrs)
+        span.started_at = item["started_at"]
+        span.seconds = item["seconds"]
+        registry.observe(span)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError:
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
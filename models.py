@@ -13,6 +13,17 @@ class JobListing(BaseModel):
     required_experience_level: str
     key_requirements: list[str]
     contact_email: str
+    platforms: list[str] = []
+    contact_emails: list[str] = []
+    url: str = ""
+    contact_verified: bool = False
 
 class JobSearchResults(BaseModel):
     jobs: list[JobListing]
+
+class JobApplicationEmail(BaseModel):
+    job_title: str
+    company: str
+    recipient_email: str
+    subject: str
+    body: str
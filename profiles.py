@@ -0,0 +1,317 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+import metrics
+from cache import CACHE_DIR, content_key
+from dedup import fingerprint
+from models import JobListing, ResumeAnalysis
+
+PROFILE_STORE = os.getenv("OPENSCOUT_PROFILE_STORE", os.path.join(CACHE_DIR, "profiles.sqlite3"))
+REFRESH_INTERVAL = float(os.getenv("OPENSCOUT_PROFILE_REFRESH_INTERVAL", 24 * 3600))
+REFRESH_WORKERS = int(os.getenv("OPENSCOUT_PROFILE_WORKERS", 4))
+SEEN_CAPACITY = int(os.getenv("OPENSCOUT_PROFILE_SEEN_CAPACITY", 20000))
+SEEN_ERROR_RATE = float(os.getenv("OPENSCOUT_PROFILE_SEEN_ERROR_RATE", 0.001))
+
+PROFILE_OPTIONS = ("fanout", "platforms")
+
+
+def queue_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def is_queue_key(resume_key: str) -> bool:
+    return resume_key.startswith("profile:")
+
+
+class BloomFilter:
+    def __init__(
+        self,
+        capacity: int = SEEN_CAPACITY,
+        error_rate: float = SEEN_ERROR_RATE,
+        bits: bytes | None = None,
+        count: int = 0,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = count
+        self.n_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.n_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from the two halves of one 128-bit digest.
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        added = False
+        for p in self._positions(key):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                added = True
+        self.count += added
+        return added
+
+
+class Profile(NamedTuple):
+    id: str
+    name: str
+    analysis: ResumeAnalysis
+    options: dict
+    seen: BloomFilter
+    created_at: float
+    refreshed_at: float
+    refresh_interval: float
+
+
+class RefreshResult(NamedTuple):
+    profile: Profile
+    new_jobs: list[JobListing]
+    error: str | None
+
+
+class ProfileStore:
+    def __init__(self, path: str = PROFILE_STORE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, analysis TEXT NOT NULL, options TEXT NOT NULL, "
+                "seen BLOB NOT NULL, seen_capacity INTEGER NOT NULL, seen_error_rate REAL NOT NULL, "
+                "seen_count INTEGER NOT NULL, created_at REAL NOT NULL, refreshed_at REAL NOT NULL, "
+                "refresh_interval REAL NOT NULL)"
+            )
+        return self._conn
+
+    @staticmethod
+    def _profile(row) -> Profile:
+        (profile_id, name, analysis, options, seen, capacity, error_rate, count,
+         created_at, refreshed_at, refresh_interval) = row
+        return Profile(
+            id=profile_id,
+            name=name,
+            analysis=ResumeAnalysis.model_validate_json(analysis),
+            options=json.loads(options),
+            seen=BloomFilter(capacity, error_rate, seen, count),
+            created_at=created_at,
+            refreshed_at=refreshed_at,
+            refresh_interval=refresh_interval,
+        )
+
+    def _select(self, where: str = "", params: tuple = ()) -> list[Profile]:
+        with self._lock:
+            rows = self._connect().execute(f"SELECT * FROM profiles {where} ORDER BY created_at", params).fetchall()
+        return [self._profile(row) for row in rows]
+
+    def save(
+        self,
+        name: str,
+        analysis: ResumeAnalysis,
+        jobs: list[JobListing] = (),
+        refresh_interval: float = REFRESH_INTERVAL,
+        **options,
+    ) -> str:
+        unknown = set(options) - set(PROFILE_OPTIONS)
+        if unknown:
+            raise ValueError(f"unknown profile options: {sorted(unknown)}")
+
+        seen = BloomFilter()
+        for job in jobs:
+            seen.add(fingerprint(job))
+        profile_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    profile_id, name, analysis.model_dump_json(), json.dumps(options), bytes(seen.bits),
+                    seen.capacity, seen.error_rate, seen.count, now, now, refresh_interval,
+                ),
+            )
+        return profile_id
+
+    def get(self, profile_id: str) -> Profile | None:
+        profiles = self._select("WHERE id = ?", (profile_id,))
+        return profiles[0] if profiles else None
+
+    def all(self) -> list[Profile]:
+        return self._select()
+
+    def due(self, now: float | None = None) -> list[Profile]:
+        return self._select("WHERE refreshed_at + refresh_interval <= ?", (now or time.time(),))
+
+    def delete(self, profile_id: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+
+    def mark_seen(self, profile_id: str, jobs: list[JobListing]) -> list[JobListing]:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT seen, seen_capacity, seen_error_rate, seen_count FROM profiles WHERE id = ?",
+                    (profile_id,),
+                ).fetchone()
+                if row is None:
+                    raise KeyError(profile_id)
+                seen = BloomFilter(row[1], row[2], row[0], row[3])
+                new_jobs = [job for job in jobs if seen.add(fingerprint(job))]
+                conn.execute(
+                    "UPDATE profiles SET seen = ?, seen_count = ?, refreshed_at = ? WHERE id = ?",
+                    (bytes(seen.bits), seen.count, time.time(), profile_id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return new_jobs
+
+
+def _search_key(profile: Profile) -> str:
+    analysis = profile.analysis
+    return content_key(
+        analysis.experience_level,
+        *sorted(skill.lower() for skill in analysis.skills),
+        "|",
+        *sorted(language.lower() for language in analysis.languages),
+        json.dumps(profile.options, sort_keys=True),
+    )
+
+
+def refresh(store: ProfileStore, profile: Profile, trace: metrics.Trace | None = None) -> list[JobListing]:
+    from agents import search_only
+
+    results = search_only(profile.analysis, trace=trace, **profile.options)
+    return store.mark_seen(profile.id, results.jobs)
+
+
+def refresh_profiles(store: ProfileStore, profiles: list[Profile], max_workers: int = REFRESH_WORKERS):
+    from agents import search_only
+
+    # Profiles with the same analysis and options share one search; each keeps its own seen-set.
+    groups = defaultdict(list)
+    for profile in profiles:
+        groups[_search_key(profile)].append(profile)
+
+    def run_group(members: list[Profile]):
+        first = members[0]
+        return search_only(first.analysis, **first.options)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_group, members): members for members in groups.values()}
+        for future in as_completed(futures):
+            members = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                for profile in members:
+                    yield RefreshResult(profile, [], str(e))
+                continue
+            for profile in members:
+                yield RefreshResult(profile, store.mark_seen(profile.id, results.jobs), None)
+
+
+def run_scheduler(store: ProfileStore, output_dir: str | None, interval: float, max_workers: int, once: bool):
+    while True:
+        due = store.due()
+        if due:
+            print(f"Atualizando {len(due)} perfis", flush=True)
+        for result in refresh_profiles(store, due, max_workers):
+            if result.error:
+                print(f"Erro em {result.profile.name}: {result.error}", file=sys.stderr, flush=True)
+                continue
+            print(f"{result.profile.name}: {len(result.new_jobs)} vagas novas", flush=True)
+            if output_dir and result.new_jobs:
+                os.makedirs(output_dir, exist_ok=True)
+                path = os.path.join(output_dir, f"{result.profile.id}-{int(time.time())}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump([job.model_dump() for job in result.new_jobs], f, ensure_ascii=False, indent=2)
+        if once:
+            return
+        time.sleep(interval)
+
+
+def _save_command(args, store: ProfileStore):
+    from agents import search_jobs
+    from batch import read_resume
+
+    resume_text = read_resume({"id": args.name, "path": args.resume})
+    options = {"fanout": args.fanout}
+    analysis, results = search_jobs(resume_text, **options)
+    profile_id = store.save(args.name, analysis, results.jobs, refresh_interval=args.interval, **options)
+    print(f"Perfil {args.name} salvo ({profile_id}) com {len(results.jobs)} vagas já vistas", flush=True)
+
+
+def _list_command(args, store: ProfileStore):
+    for profile in store.all():
+        refreshed = time.strftime("%Y-%m-%d %H:%M", time.localtime(profile.refreshed_at))
+        print(f"{profile.id}  {profile.name}  {profile.seen.count} vagas vistas  atualizado em {refreshed}")
+
+
+def _refresh_command(args, store: ProfileStore):
+    profile = store.get(args.profile_id)
+    if profile is None:
+        sys.exit(f"Perfil não encontrado: {args.profile_id}")
+    for job in refresh(store, profile):
+        print(f"{job.job_title} - {job.company} ({job.location}) {job.url}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfis salvos com busca só de vagas novas.")
+    parser.add_argument("--store", default=PROFILE_STORE, help="arquivo SQLite dos perfis")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save = commands.add_parser("save", help="analisa um currículo, busca vagas e salva o perfil")
+    save.add_argument("resume")
+    save.add_argument("--name", required=True)
+    save.add_argument("--fanout", action="store_true")
+    save.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="segundos entre atualizações")
+    save.set_defaults(handler=_save_command)
+
+    commands.add_parser("list", help="lista os perfis salvos").set_defaults(handler=_list_command)
+
+    refresh_parser = commands.add_parser("refresh", help="mostra as vagas novas de um perfil")
+    refresh_parser.add_argument("profile_id")
+    refresh_parser.set_defaults(handler=_refresh_command)
+
+    run = commands.add_parser("run", help="atualiza em lote os perfis vencidos")
+    run.add_argument("-o", "--output", help="diretório para salvar as vagas novas de cada perfil")
+    run.add_argument("-w", "--workers", type=int, default=REFRESH_WORKERS)
+    run.add_argument("--interval", type=float, default=600, help="segundos entre verificações")
+    run.add_argument("--once", action="store_true", help="faz uma única passada e sai")
+    run.set_defaults(handler=lambda args, store: run_scheduler(
+        store, args.output, args.interval, args.workers, args.once,
+    ))
+
+    args = parser.parse_args()
+    if args.command == "run":
+        metrics.start_metrics_server()
+    args.handler(args, ProfileStore(args.store))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from dedup import normalize
+from skills import load_extractor
+
+SKILL_WEIGHT = 0.6
+SENIORITY_WEIGHT = 0.25
+LANGUAGE_WEIGHT = 0.15
+
+_LEVEL_RANKS = (
+    (("estagi", "intern", "trainee", "junior", "júnior", "jr", "entry"), 0),
+    (("pleno", "mid", "intermedi"), 1),
+    (("lead", "staff", "principal", "especialista", "architect", "arquitet"), 3),
+    (("senior", "sênior", "sr"), 2),
+)
+_MAX_LEVEL_DISTANCE = 3
+
+
+@lru_cache(maxsize=1024)
+def level_rank(level: str) -> float:
+    words = normalize(level).split()
+    for prefixes, rank in _LEVEL_RANKS:
+        if any(word.startswith(prefix) for word in words for prefix in prefixes):
+            return rank
+    return math.nan
+
+
+@lru_cache(maxsize=65536)
+def _terms(text: str, fallback: bool = True) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    skills, languages = load_extractor().extract(text)
+    if not skills and not languages and fallback:
+        normalized = normalize(text)
+        skills = [normalized] if normalized else []
+    return tuple(skills), tuple(languages)
+
+
+class JobMatrix:
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.skill_vocab = {}
+        self.language_vocab = {}
+
+        skill_rows, skill_cols = [], []
+        language_rows, language_cols = [], []
+        levels = []
+        for row, job in enumerate(self.jobs):
+            skills, languages = set(), set()
+            for requirement in job.key_requirements:
+                found_skills, found_languages = _terms(requirement)
+                skills.update(found_skills)
+                languages.update(found_languages)
+            title_skills, title_languages = _terms(job.job_title, fallback=False)
+            skills.update(title_skills)
+            languages.update(title_languages)
+
+            for skill in skills:
+                skill_rows.append(row)
+                skill_cols.append(self.skill_vocab.setdefault(skill, len(self.skill_vocab)))
+            for language in languages:
+                language_rows.append(row)
+                language_cols.append(self.language_vocab.setdefault(language, len(self.language_vocab)))
+            levels.append(level_rank(job.required_experience_level))
+
+        n_jobs = len(self.jobs)
+        self.skill_rows = np.asarray(skill_rows, dtype=np.intp)
+        self.skill_cols = np.asarray(skill_cols, dtype=np.intp)
+        self.language_rows = np.asarray(language_rows, dtype=np.intp)
+        self.language_cols = np.asarray(language_cols, dtype=np.intp)
+        self.levels = np.asarray(levels, dtype=float)
+
+        document_frequency = np.bincount(self.skill_cols, minlength=len(self.skill_vocab))
+        idf = np.log((1 + n_jobs) / (1 + document_frequency)) + 1
+        self.skill_weights = idf[self.skill_cols]
+        self.skill_totals = np.bincount(self.skill_rows, weights=self.skill_weights, minlength=n_jobs)
+        self.language_totals = np.bincount(self.language_rows, minlength=n_jobs)
+
+    def _profile_vector(self, values, vocab, use_skills: bool) -> np.ndarray:
+        vector = np.zeros(len(vocab))
+        for value in values:
+            skills, languages = _terms(value)
+            for term in skills if use_skills else languages:
+                index = vocab.get(term)
+                if index is not None:
+                    vector[index] = 1.0
+        return vector
+
+    def score(self, analysis) -> np.ndarray:
+        n_jobs = len(self.jobs)
+
+        profile_skills = self._profile_vector(analysis.skills, self.skill_vocab, use_skills=True)
+        matched = np.bincount(
+            self.skill_rows, weights=self.skill_weights * profile_skills[self.skill_cols], minlength=n_jobs,
+        )
+        skill_score = np.divide(matched, self.skill_totals, out=np.zeros(n_jobs), where=self.skill_totals > 0)
+
+        candidate_level = level_rank(analysis.experience_level)
+        if math.isnan(candidate_level):
+            seniority_score = np.full(n_jobs, 0.5)
+        else:
+            seniority_score = 1 - np.abs(self.levels - candidate_level) / _MAX_LEVEL_DISTANCE
+            seniority_score[np.isnan(self.levels)] = 0.5
+
+        profile_languages = self._profile_vector(analysis.languages, self.language_vocab, use_skills=False)
+        spoken = np.bincount(
+            self.language_rows, weights=profile_languages[self.language_cols], minlength=n_jobs,
+        )
+        language_score = np.divide(
+            spoken, self.language_totals, out=np.ones(n_jobs), where=self.language_totals > 0,
+        )
+
+        return SKILL_WEIGHT * skill_score + SENIORITY_WEIGHT * seniority_score + LANGUAGE_WEIGHT * language_score
+
+
+def score_jobs(analysis, jobs) -> np.ndarray:
+    if not jobs:
+        return np.zeros(0)
+    return JobMatrix(jobs).score(analysis)
+
+
+def rank_jobs(analysis, jobs) -> list[tuple[object, float]]:
+    scores = score_jobs(analysis, jobs)
+    order = np.argsort(-scores, kind="stable")
+    return [(jobs[i], float(scores[i])) for i in order]
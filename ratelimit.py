@@ -0,0 +1,68 @@
+import os
+import random
+import threading
+import time
+import urllib.error
+
+DEFAULT_RPM = {
+    "openai": 60,
+    "serper": 100,
+}
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    def __init__(self, max_per_minute: float, burst: int | None = None):
+        self.rate = max_per_minute / 60
+        self.capacity = burst if burst is not None else max(1, int(max_per_minute))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            rpm = float(os.getenv(f"OPENSCOUT_RPM_{provider.upper()}", DEFAULT_RPM.get(provider, 60)))
+            limiter = _limiters[provider] = RateLimiter(rpm)
+        return limiter
+
+
+def is_transient(error: BaseException | None) -> bool:
+    # Imported here: the Streamlit page imports this module through emails.py and must not load openai.
+    import openai
+
+    # Walks the cause chain: crewai and urllib wrap the provider error.
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code in TRANSIENT_STATUS
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in TRANSIENT_STATUS
+        if isinstance(error, (openai.APIConnectionError, urllib.error.URLError, TimeoutError, ConnectionError)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def backoff(attempt: int, base_delay: float, retry_after: str | None = None) -> float:
+    if retry_after and retry_after.strip().isdigit():
+        return float(retry_after)
+    return base_delay * 2 ** attempt + random.uniform(0, base_delay)
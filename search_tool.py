@@ -0,0 +1,178 @@
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from cache import DiskCache
+import metrics
+from ratelimit import backoff, get_limiter, is_transient
+
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+SERPER_RETRIES = int(os.getenv("OPENSCOUT_SERPER_RETRIES", 3))
+
+_QUERY_TOKENS = re.compile(r'"[^"]*"|\S+')
+_OPERATORS = {"OR", "AND"}
+
+
+def normalize_query(query: str) -> str:
+    # Cache and coalescing key only: the query sent to Serper is the one the agent wrote.
+    # Word order is only ignored without operators; OR/AND bind the words next to them.
+    tokens = _QUERY_TOKENS.findall(unicodedata.normalize("NFKC", query))
+    tokens = [token if token in _OPERATORS else token.lower() for token in tokens]
+    if not _OPERATORS.intersection(tokens):
+        tokens.sort()
+    return " ".join(tokens)
+
+
+class SerperClient:
+    def __init__(
+        self,
+        base_url: str = SERPER_BASE_URL,
+        api_key: str | None = None,
+        ttl: float = float(os.getenv("OPENSCOUT_SEARCH_CACHE_TTL", 6 * 3600)),
+        max_entries: int = int(os.getenv("OPENSCOUT_SEARCH_CACHE_MAX_ENTRIES", 20000)),
+        memory_entries: int = 512,
+        n_results: int = 10,
+        timeout: float = 15,
+        retries: int = SERPER_RETRIES,
+        base_delay: float = 1.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.ttl = ttl
+        self.n_results = n_results
+        self.timeout = timeout
+        self.retries = retries
+        self.base_delay = base_delay
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._disk = DiskCache("serper", ttl=ttl, max_entries=max_entries)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def search(self, query: str) -> str:
+        key = normalize_query(query)
+
+        with self._lock:
+            cached = self._memory_get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = self._disk.get(key)
+            with self._lock:
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if value is None:
+                value = self._fetch(" ".join(query.split()))
+                self._disk.set(key, value)
+            with self._lock:
+                self._memory_set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: str):
+        self._memory[key] = (time.monotonic() + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _fetch(self, query: str) -> str:
+        # Only 408/429/5xx, timeouts and dropped connections are retried; a bad key or query fails at once.
+        for attempt in range(self.retries + 1):
+            get_limiter("serper").wait()
+            try:
+                return self._request(query)
+            except Exception as e:
+                if attempt == self.retries or not is_transient(e):
+                    raise
+                metrics.add_retries()
+                retry_after = e.headers.get("Retry-After") if isinstance(e, urllib.error.HTTPError) else None
+                time.sleep(backoff(attempt, self.base_delay, retry_after))
+
+    def _request(self, query: str) -> str:
+        request = urllib.request.Request(
+            f"{self.base_url}/search",
+            data=json.dumps({"q": query, "num": self.n_results}).encode("utf-8"),
+            headers={
+                "X-API-KEY": self.api_key or os.getenv("SERPER_API_KEY", ""),
+                "Content-Type": "application/json",
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+
+        results = [
+            {"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+            for item in payload.get("organic", [])
+        ]
+        return json.dumps(results, ensure_ascii=False)
+
+
+serper_client = SerperClient()
+
+
+class CachedSerperToolSchema(BaseModel):
+    search_query: str = Field(..., description="Consulta obrigatória para buscar no Google")
+
+
+class CachedSerperTool(BaseTool):
+    name: str = "Search the internet with Serper"
+    description: str = (
+        "Busca no Google via Serper e retorna título, link e trecho de cada resultado. "
+        "Consultas repetidas são respondidas a partir do cache."
+    )
+    args_schema: Type[BaseModel] = CachedSerperToolSchema
+
+    def _run(self, search_query: str) -> str:
+        with metrics.span("tool:serper"):
+            return serper_client.search(search_query)
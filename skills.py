@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from collections import Counter, deque
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
+
+from models import ResumeAnalysis
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+
+LEVELS = ("Junior", "Pleno", "Senior")
+
+_LEVEL_PATTERNS = {
+    "Senior": re.compile(
+        r"(?<!\w)(s[eê]nior|sr\.|tech lead|lead developer|staff engineer|principal engineer|especialista)(?!\w)",
+        re.IGNORECASE,
+    ),
+    "Pleno": re.compile(r"(?<!\w)(pleno|pl\.|mid[- ]level|intermedi[aá]rio)(?!\w)", re.IGNORECASE),
+    "Junior": re.compile(
+        r"(?<!\w)(j[uú]nior|jr\.|trainee|estagi[aá]ri[oa]|est[aá]gio|intern|internship|entry[- ]level)(?!\w)",
+        re.IGNORECASE,
+    ),
+}
+_YEARS = re.compile(r"(\d{1,2})\s*\+?\s*(anos|years|yrs)", re.IGNORECASE)
+_DATE_RANGE = re.compile(
+    r"(?<!\d)((?:19|20)\d{2})\s*(?:-|–|—|a|até|to)\s*((?:19|20)\d{2}|atual|presente|present|hoje|now|current)",
+    re.IGNORECASE,
+)
+_NON_BOUNDARY = set("+#$")
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    value: object
+
+
+class KeywordAutomaton:
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, pattern: str, value):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append((len(pattern), value))
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        return self
+
+    def finditer(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                yield Match(i + 1 - length, i + 1, value)
+
+
+class SkillExtractor:
+    def __init__(self, taxonomy: dict):
+        self.version = taxonomy["version"]
+        self._case_sensitive = {}
+        for surface in taxonomy.get("case_sensitive", []):
+            self._case_sensitive.setdefault(surface.lower(), set()).add(surface)
+
+        self._automaton = KeywordAutomaton()
+        for kind in ("skills", "languages"):
+            for canonical, aliases in taxonomy[kind].items():
+                for surface in {canonical.lower(), *(alias.lower() for alias in aliases)}:
+                    self._automaton.add(surface, (kind, canonical))
+        self._automaton.build()
+
+    def _accepts(self, text: str, match: Match) -> bool:
+        if match.start > 0:
+            before = text[match.start - 1]
+            if before.isalnum() or before in _NON_BOUNDARY:
+                return False
+        if match.end < len(text):
+            after = text[match.end]
+            if after.isalnum() or after in _NON_BOUNDARY:
+                return False
+
+        surface = text[match.start:match.end]
+        exact = self._case_sensitive.get(surface.lower())
+        if exact is None:
+            return True
+        # "C-level", "C-suite": a one-letter name glued to a word by a hyphen is not the language.
+        if len(surface) == 1 and text[match.end:match.end + 1] == "-" and text[match.end + 1:match.end + 2].isalpha():
+            return False
+        return surface in exact
+
+    def extract(self, text: str) -> tuple[list[str], list[str]]:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+        candidates = [m for m in self._automaton.finditer(lowered) if self._accepts(text, m)]
+        candidates.sort(key=lambda m: (m.start, m.start - m.end))
+
+        found = {"skills": {}, "languages": {}}
+        covered_until = 0
+        for match in candidates:
+            if match.start < covered_until:
+                continue
+            covered_until = match.end
+            kind, canonical = match.value
+            found[kind].setdefault(canonical, None)
+
+        return list(found["skills"]), list(found["languages"])
+
+
+class LocalAnalysis(NamedTuple):
+    analysis: ResumeAnalysis
+    ambiguous: list[str]
+
+
+def _level_from_years(years: float):
+    if years < 3:
+        return "Junior"
+    if years < 6:
+        return "Pleno"
+    return "Senior"
+
+
+def _years_of_experience(text: str):
+    explicit = [int(n) for n, _ in _YEARS.findall(text) if 0 < int(n) <= 45]
+
+    current_year = date.today().year
+    spans = []
+    for start, end in _DATE_RANGE.findall(text):
+        start = int(start)
+        end = int(end) if end.isdigit() else current_year
+        if start <= end <= current_year:
+            spans.append((start, end))
+
+    covered = 0
+    last_end = None
+    for start, end in sorted(spans):
+        if last_end is not None and start < last_end:
+            start = last_end
+        if end > start:
+            covered += end - start
+        last_end = end if last_end is None else max(last_end, end)
+
+    candidates = explicit + ([covered] if covered else [])
+    return max(candidates) if candidates else None
+
+
+def keyword_experience_level(text: str):
+    mentions = Counter({level: len(pattern.findall(text)) for level, pattern in _LEVEL_PATTERNS.items()})
+    ranked = mentions.most_common(2)
+    if ranked[0][1] and ranked[0][1] > ranked[1][1]:
+        return ranked[0][0]
+    return None
+
+
+def estimate_experience_level(text: str) -> tuple[str, bool]:
+    keyword_level = keyword_experience_level(text)
+    years = _years_of_experience(text)
+    years_level = _level_from_years(years) if years is not None else None
+
+    if keyword_level and years_level:
+        return keyword_level, keyword_level != years_level
+    if keyword_level or years_level:
+        return keyword_level or years_level, False
+    return "Pleno", True
+
+
+@lru_cache(maxsize=None)
+def load_extractor(path: str = TAXONOMY_PATH) -> SkillExtractor:
+    with open(path, encoding="utf-8") as f:
+        return SkillExtractor(json.load(f))
+
+
+def analyze_resume_locally(resume_text: str) -> LocalAnalysis:
+    skills, languages = load_extractor().extract(resume_text)
+    experience_level, level_ambiguous = estimate_experience_level(resume_text)
+    return LocalAnalysis(
+        ResumeAnalysis(experience_level=experience_level, skills=skills, languages=languages),
+        ["experience_level"] if level_ambiguous else [],
+    )